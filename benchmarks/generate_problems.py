@@ -0,0 +1,24 @@
+import numpy as np
+from typing import List, Tuple
+from constants.file_paths import HAMILTONIAN_FILE_PATH
+from utils.load_hamiltonian import load_hamiltonian
+from vqa_utils.pauli_compose import pauli_compose
+from vqa_utils.pauli_sum import PauliSum
+
+# Четырехпараметровый анзац из файла "Ввод анзаца.txt"
+H2_ANSATZ = [(1.0, [0, 0, 2, 1]), (1.0, [1, 2, 0, 0]), (1.0, [1, 1, 1, 2]), (1.0, [1, 2, 1, 1])]
+
+def load_h2_problem() -> Tuple[List[Tuple[complex, List[int]]], PauliSum]:
+    return H2_ANSATZ, load_hamiltonian(HAMILTONIAN_FILE_PATH)
+
+def generate_problem(num_qubits: int, num_terms: int, num_parameters: int, seed: int = 0) -> Tuple[List[Tuple[complex, List[int]]], List[Tuple[complex, List[int]]]]:
+    rng = np.random.default_rng(seed)
+    pauli_operators = [(1.0, rng.integers(0, 4, num_qubits).tolist()) for _ in range(num_parameters)]
+
+    # Диагональная часть (I/Z) и недиагональные слагаемые, которые связывают носитель U|0...0> сам с собой
+    hamiltonian_operators = [(float(rng.normal()), (3 * rng.integers(0, 2, num_qubits)).tolist()) for _ in range(num_terms // 2)]
+    while len(hamiltonian_operators) < num_terms:
+        i, j = rng.integers(0, num_parameters, 2)
+        _, product = pauli_compose(tuple(pauli_operators[i][1]), tuple(pauli_operators[j][1]))
+        hamiltonian_operators.append((float(rng.normal()), list(product)))
+    return pauli_operators, hamiltonian_operators
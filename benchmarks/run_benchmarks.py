@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from vqa_utils.pauli_compose import pauli_compose
+from vqa_utils.calculate_ansatz import calculate_ansatz
+from vqa_utils.compute_uhu import compute_uhu
+from vqa_utils.calculate_expectation import calculate_expectation
+from vqa_utils.create_backend import create_backend
+from vqa_utils.run_optimizer import run_optimizer
+from vqa_utils.generate_shifted_theta import generate_shifted_theta
+from vqa_utils.pauli_sum import PauliSum
+from vqa_utils.preprocess_hamiltonian import compress_hamiltonian, group_by_x_mask, qubit_wise_commuting_groups
+from vqa_utils.reference_solver import reference_energies, CHEMICAL_ACCURACY
+from .generate_problems import generate_problem, load_h2_problem
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (число кубитов, число слагаемых гамильтониана, число параметров анзаца)
+PROBLEM_SIZES = [(4, 16, 4), (6, 40, 6), (8, 80, 8), (10, 160, 10), (12, 320, 12)]
+QUICK_PROBLEM_SIZES = [(4, 16, 4), (6, 40, 6)]
+
+# Допустимое расхождение энергий точных бэкендов и запас ниже точного минимума (вариационный принцип)
+ENERGY_TOLERANCE = 1e-10
+
+def measure(function: Callable[[], Any], min_time: float = 0.5, max_calls: int = 10000) -> Dict[str, float]:
+    function()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = 0
+    start = time.perf_counter()
+    while calls < max_calls:
+        function()
+        calls += 1
+        if time.perf_counter() - start >= min_time:
+            break
+    elapsed = time.perf_counter() - start
+    return {"calls": calls, "seconds_per_call": elapsed / calls, "calls_per_second": calls / elapsed, "peak_memory_bytes": peak}
+
+def benchmark_hot_paths(name: str, pauli_operators: List[Any], hamiltonian_operators: List[Any], backends: List[str], min_time: float,
+    batch_size: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    theta = rng.uniform(0, 2 * np.pi, len(pauli_operators))
+    thetas = rng.uniform(0, 2 * np.pi, (batch_size, len(pauli_operators)))
+    # Поочередные точки, отличающиеся одной координатой: для инкрементального бэкенда это замер сдвига одного параметра
+    moved = theta.copy()
+    moved[-1] += 0.1
+    source = hamiltonian_operators if isinstance(hamiltonian_operators, PauliSum) else PauliSum.from_terms(hamiltonian_operators)
+    s1, s2 = tuple(pauli_operators[0][1]), tuple(source.to_indices_array()[-1].tolist())
+    result: Dict[str, Any] = {"problem": name, "num_qubits": len(s1), "num_parameters": len(pauli_operators),
+        "num_hamiltonian_terms": len(hamiltonian_operators)}
+    hamiltonian = compress_hamiltonian(source)
+    result["num_x_mask_groups"] = len(group_by_x_mask(hamiltonian)[0])
+    result["num_qubit_wise_commuting_groups"] = len(qubit_wise_commuting_groups(hamiltonian)[1])
+    # Энергия основного состояния и минимум в секторе симметрий анзаца; без кэша, чтобы время отражало диагонализацию
+    start = time.perf_counter()
+    result["exact_ground_energy"], result["sector_reference_energy"] = reference_energies(pauli_operators, hamiltonian, cache_dir=None)
+    result["reference_seconds"] = time.perf_counter() - start
+
+    result["pauli_compose"] = measure(lambda: pauli_compose(s1, s2), min_time)
+    result["calculate_ansatz"] = measure(lambda: calculate_ansatz(theta, pauli_operators), min_time)
+    ansatz_dict, _, _ = calculate_ansatz(theta, pauli_operators)
+    result["num_ansatz_terms"] = len(ansatz_dict)
+    # Полное построение U†HU квадратично по |U|, поэтому замеряется только на небольших задачах
+    if len(ansatz_dict) ** 2 * len(hamiltonian_operators) <= 5_000_000:
+        result["compute_uhu"] = measure(lambda: compute_uhu(ansatz_dict, hamiltonian_operators), min_time)
+        uhu_dict = compute_uhu(ansatz_dict, hamiltonian_operators)
+        result["num_uhu_terms"] = len(uhu_dict)
+        result["calculate_expectation"] = measure(lambda: calculate_expectation(uhu_dict), min_time)
+
+    result["backends"] = {}
+    for backend_name in backends:
+        backend = create_backend(backend_name, pauli_operators, hamiltonian_operators)
+        points = itertools.cycle([theta, moved])
+        result["backends"][backend.name if backend_name != "auto" else f"auto:{backend.name}"] = {
+            "energy": float(backend.energy(theta)),
+            "single": measure(lambda: backend.energy(next(points)), min_time),
+            "batch": {"batch_size": batch_size, **measure(lambda: backend.batch_energy(thetas), min_time)},
+            "gradient": measure(lambda: backend.energy_and_gradient(theta), min_time),
+        }
+    check_energies(name, result)
+    return result
+
+def check_energies(name: str, result: Dict[str, Any]) -> None:
+    # Быстрый, но неверный бэкенд не должен проходить замер: точные бэкенды обязаны давать одну энергию,
+    # и она не может быть ниже минимума в секторе симметрий анзаца
+    energies = {backend: stats["energy"] for backend, stats in result["backends"].items() if not backend.endswith("truncated")}
+    if energies and max(energies.values()) - min(energies.values()) > ENERGY_TOLERANCE * max(1.0, max(abs(e) for e in energies.values())):
+        raise RuntimeError(f"{name}: энергии бэкендов расходятся: {energies}")
+    reference = result.get("sector_reference_energy")
+    if energies and reference is not None and min(energies.values()) < reference - ENERGY_TOLERANCE * max(1.0, abs(reference)):
+        raise RuntimeError(f"{name}: энергия бэкенда ниже точного минимума {reference}: {energies}")
+
+def benchmark_time_to_target(optimizers: List[str], backend: str, num_iterations: int, target_energy: Optional[float] = None,
+    tolerance: float = CHEMICAL_ACCURACY, seed: int = 0) -> List[Dict[str, Any]]:
+    pauli_operators, hamiltonian_operators = load_h2_problem()
+    # По умолчанию цель - минимум в секторе симметрий анзаца (для H2 он совпадает с энергией основного состояния)
+    exact_energy, sector_energy = reference_energies(pauli_operators, hamiltonian_operators)
+    target_energy = sector_energy if target_energy is None else target_energy
+    results = []
+    for optimizer in optimizers:
+        reached_at: List[Optional[float]] = [None]
+        start = time.perf_counter()
+
+        def callback(theta: np.ndarray, energy: float) -> bool:
+            if reached_at[0] is None and energy <= target_energy + tolerance:
+                reached_at[0] = time.perf_counter() - start
+            return reached_at[0] is not None
+
+        tracemalloc.start()
+        _, energy = run_optimizer(initial_theta=generate_shifted_theta(pauli_operators, np.random.default_rng(seed)), pauli_operators=pauli_operators,
+            hamiltonian_operators=hamiltonian_operators, progress=None, task=None, optimizer=optimizer, backend=backend,
+            num_iterations_per_temp=num_iterations, seed=seed, callback=callback, verbose=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        elapsed = time.perf_counter() - start
+        if reached_at[0] is None and energy <= target_energy + tolerance:
+            reached_at[0] = elapsed
+        results.append({"optimizer": optimizer, "backend": backend, "final_energy": float(energy), "target_energy": target_energy,
+            "tolerance": tolerance, "exact_ground_energy": exact_energy, "gap": float(energy) - exact_energy,
+            "sector_reference_energy": sector_energy, "sector_gap": float(energy) - sector_energy, "seconds": elapsed,
+            "time_to_target": reached_at[0], "peak_memory_bytes": peak})
+    best = min(results, key=lambda result: result["final_energy"], default=None)
+    if best is not None and best["final_energy"] < sector_energy - ENERGY_TOLERANCE * max(1.0, abs(sector_energy)):
+        raise RuntimeError(f"{best['optimizer']}: энергия {best['final_energy']} ниже точного минимума {sector_energy}")
+    return results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк вычисления энергии и оптимизации VQE")
+    parser.add_argument("--backends", nargs="+", default=["pauli", "statevector", "incremental", "auto"])
+    parser.add_argument("--optimizers", nargs="+", default=["anneal", "hybrid", "lbfgs", "rotosolve"])
+    parser.add_argument("--min-time", type=float, default=0.5, help="минимальное время замера одной операции, с")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--anneal-iterations", type=int, default=38)
+    parser.add_argument("--quick", action="store_true", help="только небольшие задачи")
+    parser.add_argument("--output", type=Path, default=None, help="путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    problems = [("h2", *load_h2_problem())]
+    for num_qubits, num_terms, num_parameters in (QUICK_PROBLEM_SIZES if args.quick else PROBLEM_SIZES):
+        problems.append((f"random_q{num_qubits}_h{num_terms}_p{num_parameters}", *generate_problem(num_qubits, num_terms, num_parameters)))
+
+    report: Dict[str, Any] = {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+        "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "hot_paths": [], "time_to_target": []}
+    for name, pauli_operators, hamiltonian_operators in problems:
+        print(f"Замер: {name}")
+        report["hot_paths"].append(benchmark_hot_paths(name, pauli_operators, hamiltonian_operators, args.backends, args.min_time, args.batch_size))
+
+    print("Замер: время достижения точной энергии H2")
+    report["time_to_target"] = benchmark_time_to_target(args.optimizers, "auto", args.anneal_iterations)
+
+    output = args.output or RESULTS_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Результаты записаны в {output}")
+
+if __name__ == "__main__":
+    main()
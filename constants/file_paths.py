@@ -9,3 +9,8 @@ def get_base_path() -> Path:
 
 HAMILTONIAN_FILE_PATH: Path = get_base_path() / "params" / "hamiltonian_operators.txt"
 OUTPUT_FILE_PATH: Path = get_base_path() / "output.log"
+PLAN_CACHE_DIR: Path = get_base_path() / "cache" / "plans"
+HAMILTONIAN_CACHE_DIR: Path = get_base_path() / "cache" / "hamiltonians"
+REFERENCE_CACHE_DIR: Path = get_base_path() / "cache" / "reference"
+CHECKPOINT_DIR: Path = get_base_path() / "checkpoints"
+TELEMETRY_FILE_PATH: Path = get_base_path() / "telemetry.json"
@@ -6,3 +6,12 @@ PAULI_MAP = {
     (2, 3): (1j, 1),    # Y*Z = iX
     (3, 2): (-1j, 1),   # Z*Y = -iX
 }
+
+# Симплектическое представление: индекс Паули -> (бит X, бит Z)
+PAULI_TO_XZ = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+# Обратное отображение: (бит X | бит Z << 1) -> индекс Паули
+XZ_TO_PAULI = (0, 1, 3, 2)
+
+# Степени мнимой единицы i^k, k = 0..3
+PHASE_POWERS = (1.0 + 0j, 1j, -1.0 + 0j, -1j)
@@ -1,5 +1,9 @@
+import argparse
 import sys
 import io
+import multiprocessing
+from pathlib import Path
+import numpy as np
 from rich.progress import Progress, BarColumn, TextColumn, SpinnerColumn
 from rich.panel import Panel
 from rich.table import Table
@@ -7,18 +11,27 @@ from rich.rule import Rule
 
 from utils.console_and_print import console_and_print
 from utils.initialize_environment import initialize_environment
-from utils.read_hamiltonian_data import read_hamiltonian_data
+from utils.load_hamiltonian import load_hamiltonian
 from utils.print_hamiltonian import print_hamiltonian
 from utils.print_pauli_table import print_pauli_table
 from utils.print_composition_table import print_composition_table
-from utils.calculate_temp_steps import calculate_temp_steps
 from vqa_utils.pauli_compose import pauli_compose
 from vqa_utils.generate_shifted_theta import generate_shifted_theta
-from vqa_utils.simulated_annealing import simulated_annealing
+from vqa_utils.run_optimizer import run_optimizer
+from vqa_utils.multi_start_annealing import multi_start_annealing
+from vqa_utils.simulated_annealing import total_annealing_steps
 from vqa_utils.calculate_ansatz import calculate_ansatz
-from vqa_utils.compute_uhu import compute_uhu
-from vqa_utils.calculate_expectation import calculate_expectation
-from constants.file_paths import HAMILTONIAN_FILE_PATH
+from vqa_utils.preprocess_hamiltonian import compress_hamiltonian, group_by_x_mask, qubit_wise_commuting_groups
+from vqa_utils.taper_qubits import taper_problem
+from vqa_utils.checkpoint import load_checkpoint, save_checkpoint
+from vqa_utils.telemetry import TELEMETRY
+from vqa_utils.plan_cache import configure_plan_cache
+from vqa_utils.reference_solver import reference_energies, chemical_accuracy_callback, hamiltonian_hash, CHEMICAL_ACCURACY, MAX_REFERENCE_QUBITS
+from constants.file_paths import HAMILTONIAN_FILE_PATH, CHECKPOINT_DIR, TELEMETRY_FILE_PATH, PLAN_CACHE_DIR, HAMILTONIAN_CACHE_DIR
+
+# Описание прерываемого расчета: анзац и seed, по которым --resume находит контрольные точки запусков,
+# а также хэш гамильтониана и параметры отжига, с которыми эти точки записаны
+RUN_CHECKPOINT_PATH = CHECKPOINT_DIR / "run.json"
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
@@ -63,10 +76,43 @@ def print_pauli_table(console, pauli_operators):
         table.add_row(str(i), f"{coeff:.2f}", " ".join(map(str, indices)))
     console.print(table)
 
+class TelemetryProgress(Progress):
+    # Прогресс отжига и таблица телеметрии в одном обновляемом окне
+    def get_renderables(self):
+        yield from super().get_renderables()
+        yield TELEMETRY
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Поиск энергии основного состояния гамильтониана с анзацем из операторов Паули")
+    parser.add_argument("--resume", action="store_true", help="продолжить прерванный расчет с сохраненных контрольных точек")
+    parser.add_argument("--telemetry", nargs="?", type=Path, const=TELEMETRY_FILE_PATH, default=None,
+        help=f"замеры этапов, размеров разложений и памяти с записью в JSON (по умолчанию {TELEMETRY_FILE_PATH})")
+    parser.add_argument("--plan-cache", nargs="?", type=Path, const=PLAN_CACHE_DIR, default=None,
+        help=f"сохранять скомпилированные планы анзаца на диск для повторных запусков (по умолчанию в {PLAN_CACHE_DIR})")
+    parser.add_argument("--hamiltonian-cache", nargs="?", type=Path, const=HAMILTONIAN_CACHE_DIR, default=None,
+        help=f"сохранять разобранный гамильтониан на диск, чтобы не разбирать файл повторно (по умолчанию в {HAMILTONIAN_CACHE_DIR})")
+    parser.add_argument("--reference", action="store_true",
+        help=f"найти точную энергию основного состояния и минимум в секторе симметрий анзаца (до {MAX_REFERENCE_QUBITS} кубитов) и вывести отклонения от них")
+    parser.add_argument("--stop-at-chemical-accuracy", action="store_true",
+        help="останавливать запуски по достижении химической точности относительно минимума в секторе симметрий (включает --reference)")
+    args = parser.parse_args()
+    if args.telemetry is not None:
+        TELEMETRY.enable()
+    if args.plan_cache is not None:
+        configure_plan_cache(args.plan_cache)
+
     console = initialize_environment()
     console.print(Rule(":computer: Начало работы программы :computer:"))
-    pauli_operators = get_pauli_operators_from_user(console)
+    manifest = load_checkpoint(RUN_CHECKPOINT_PATH) if args.resume else None
+    if args.resume and manifest is None:
+        console.print(Panel(f"[bold red]Контрольные точки прерванного расчета не найдены в {CHECKPOINT_DIR}[/]", border_style="red"))
+        return
+    if manifest is not None:
+        # Анзац и seed берутся из прерванного расчета, чтобы каждый запуск продолжил свою контрольную точку
+        pauli_operators = [(coeff, indices) for coeff, indices in manifest["pauli_operators"]]
+        console.print(f"[bold green]Продолжение расчета с контрольных точек из {CHECKPOINT_DIR}[/]")
+    else:
+        pauli_operators = get_pauli_operators_from_user(console)
     if len(pauli_operators) < 2:
         console.print(Panel("[bold red]Ошибка: требуется минимум 2 оператора Паули![/]"))
         return
@@ -76,38 +122,105 @@ def main() -> None:
         console.print(Panel(msg, border_style="red"))
         return
 
+    exact_energy, sector_energy = None, None
     try:
         console.print("[bold green]Чтение гамильтониана...[/]")
-        hamiltonian_operators, _ = read_hamiltonian_data(HAMILTONIAN_FILE_PATH)
+        # PauliSum (из файла или бинарного кэша) передается дальше без преобразования в списки Python
+        hamiltonian_operators = load_hamiltonian(HAMILTONIAN_FILE_PATH, args.hamiltonian_cache)
         console.print("\n[bold blue]Гамильтониан:[/]")
         print_hamiltonian(console, hamiltonian_operators)
+        hamiltonian = compress_hamiltonian(hamiltonian_operators)
+        console_and_print(console, f"Слагаемых: {np.count_nonzero(hamiltonian_operators.coeffs)}, после слияния: {len(hamiltonian)}, "
+            f"групп X-масок: {len(group_by_x_mask(hamiltonian)[0])}, кубитно-коммутирующих групп: {len(qubit_wise_commuting_groups(hamiltonian)[1])}")
+        _, tapered_hamiltonian, tapering = taper_problem(pauli_operators, hamiltonian)
+        console_and_print(console, f"Z2-симметрий гамильтониана и анзаца: {tapering.num_tapered}, кубитов после сужения: {tapered_hamiltonian.num_qubits}")
+        if args.reference or args.stop_at_chemical_accuracy:
+            exact_energy, sector_energy = reference_energies(pauli_operators, hamiltonian)
+        if exact_energy is not None:
+            console_and_print(console, f"Точная энергия основного состояния (диагонализация): {exact_energy:.8f}")
+        if sector_energy is not None:
+            # Ниже этого минимума анзац из |0...0> опуститься не может
+            console_and_print(console, f"Минимум в секторе симметрий анзаца: {sector_energy:.8f}")
         print_pauli_table(console, pauli_operators)
         print_composition_table(console, pauli_compose, [op for _, op in pauli_operators])
     except ValueError as e:
             print(f"Ошибка импорта файла с описанием гамильтониана.")
 
-    SA_PARAMS = {"initial_temp": 50.0, "cooling_rate": 0.98, "min_temp": 1e-6, "num_iterations_per_temp": 38, "step_size": 0.05}
+    SA_PARAMS = {"initial_temp": 50.0, "cooling_rate": 0.98, "min_temp": 1e-6, "num_iterations_per_temp": 38, "step_size": 0.05, "backend": "auto",
+        "optimizer": "anneal", "hamiltonian_threshold": 0.0,
+        "taper_qubits": True, "move": "gaussian", "num_chains": 8, "adaptive_step": True,
+        "noise": "noiseless", "noise_scale": 0.05, "shots": 1000}
+    RUN_PARAMS = {"num_restarts": 5, "max_workers": None, "seed": None, "target_energy": None, "tolerance": 0.0}
+    if args.stop_at_chemical_accuracy and sector_energy is not None and RUN_PARAMS["target_energy"] is None:
+        # Без заданной цели запуски останавливаются по достижении химической точности относительно достижимого минимума
+        RUN_PARAMS.update(target_energy=sector_energy, tolerance=CHEMICAL_ACCURACY)
+
+    # Контрольные точки продолжаются только для того же гамильтониана и тех же параметров отжига и числа запусков:
+    # иначе цепочки прерванного расчета молча продолжились бы на другой задаче
+    run_description = {"hamiltonian_hash": hamiltonian_hash(hamiltonian), "num_restarts": RUN_PARAMS["num_restarts"], "sa_params": SA_PARAMS}
+    if manifest is None:
+        RUN_PARAMS["seed"] = RUN_PARAMS["seed"] if RUN_PARAMS["seed"] is not None else int(np.random.SeedSequence().entropy)
+        for stale in CHECKPOINT_DIR.glob("restart_*.json"):
+            stale.unlink()
+        save_checkpoint(RUN_CHECKPOINT_PATH, {"pauli_operators": pauli_operators, "seed": RUN_PARAMS["seed"], **run_description})
+    else:
+        saved_params = manifest.get("sa_params") or {}
+        changed = [f"SA_PARAMS[{name!r}]" for name in sorted(set(saved_params) | set(SA_PARAMS)) if saved_params.get(name) != SA_PARAMS.get(name)]
+        if manifest.get("num_restarts") != RUN_PARAMS["num_restarts"]:
+            changed.insert(0, "RUN_PARAMS['num_restarts']")
+        if manifest.get("hamiltonian_hash") != run_description["hamiltonian_hash"]:
+            changed.insert(0, f"гамильтониан ({HAMILTONIAN_FILE_PATH.name})")
+        if changed:
+            console.print(Panel(f"[bold red]Контрольные точки в {CHECKPOINT_DIR} относятся к другому расчету, изменились: {', '.join(changed)}.\n"
+                "Верните прежние данные или запустите расчет заново без --resume.[/]", border_style="red"))
+            return
+        RUN_PARAMS["seed"] = manifest["seed"]
 
-    thermalization_steps = int(SA_PARAMS["num_iterations_per_temp"] * 0.2)
-    temp_steps = calculate_temp_steps(SA_PARAMS["initial_temp"], SA_PARAMS["cooling_rate"], SA_PARAMS["min_temp"])
-    total_steps = temp_steps * (thermalization_steps + SA_PARAMS["num_iterations_per_temp"])
+    total_steps = total_annealing_steps(SA_PARAMS["initial_temp"], SA_PARAMS["cooling_rate"], SA_PARAMS["min_temp"],
+        SA_PARAMS["num_iterations_per_temp"])
 
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(bar_width=None),
+    progress_class = TelemetryProgress if TELEMETRY.enabled else Progress
+    with progress_class(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(bar_width=None),
     TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),) as progress:
         task = progress.add_task("[cyan]Отжиг...", total=total_steps)
-        optimized_theta, best_energy = simulated_annealing(initial_theta=generate_shifted_theta(pauli_operators),
-            pauli_operators=pauli_operators, hamiltonian_operators=hamiltonian_operators,
-            progress=progress, task=task, **SA_PARAMS)
+        if RUN_PARAMS["num_restarts"] > 1:
+            optimized_theta, best_energy, energies, stopped = multi_start_annealing(pauli_operators=pauli_operators,
+                hamiltonian_operators=hamiltonian_operators, progress=progress, task=task, checkpoint_dir=CHECKPOINT_DIR, resume=args.resume,
+                telemetry=TELEMETRY.enabled, plan_cache_dir=args.plan_cache, **RUN_PARAMS, **SA_PARAMS)
+        else:
+            optimized_theta, best_energy = run_optimizer(initial_theta=generate_shifted_theta(pauli_operators, np.random.default_rng(RUN_PARAMS["seed"])),
+                pauli_operators=pauli_operators, hamiltonian_operators=hamiltonian_operators,
+                progress=progress, task=task, seed=RUN_PARAMS["seed"], checkpoint_path=CHECKPOINT_DIR / "restart_0.json", resume=args.resume,
+                callback=chemical_accuracy_callback(RUN_PARAMS["target_energy"], RUN_PARAMS["tolerance"]) if RUN_PARAMS["target_energy"] is not None else None,
+                **SA_PARAMS)
+            energies, stopped = [best_energy], [False]
+    if TELEMETRY.enabled:
+        TELEMETRY.write_json(args.telemetry)
+        console.print(f"[bold blue]Телеметрия записана в {args.telemetry}[/]")
 
     ansatz_dict, ansatz_symbolic, ansatz_numeric = calculate_ansatz(optimized_theta, pauli_operators)
-    uhu_dict = compute_uhu(ansatz_dict, hamiltonian_operators)
     console.print(Panel(ansatz_symbolic, title="[bold green]Символьное представление анзаца[/]", border_style="green"))
     console.print(Panel(ansatz_numeric, title="[bold purple]Численное представление анзаца[/]", border_style="purple"))
     console.print(Panel(f"{best_energy:.6f}", title="[bold green]Энергия (<0|U†HU|0> для состояния |0...0>)[/]", border_style="green"))
+    gaps = [(label, best_energy - energy) for label, energy in (("от точной энергии основного состояния", exact_energy),
+        ("от минимума в секторе симметрий анзаца", sector_energy)) if energy is not None]
+    if gaps:
+        console.print(Panel("\n".join(f"{label}: {gap:.2e} ({'в пределах' if gap <= CHEMICAL_ACCURACY else 'вне'} химической точности {CHEMICAL_ACCURACY})"
+            for label, gap in gaps), title="[bold blue]Отклонение энергии[/]", border_style="blue"))
+    if len(energies) > 1:
+        # Энергии досрочно остановленных запусков промежуточные: они помечаются и не входят в медиану
+        completed = [energy for energy, flag in zip(energies, stopped) if not flag]
+        text = " ".join(f"{energy:.6f}{'*' if flag else ''}" for energy, flag in zip(energies, stopped))
+        if any(stopped):
+            text += "\n* - запуск остановлен досрочно"
+        if completed:
+            text += f"\nМедиана завершенных запусков: {np.median(completed):.6f}"
+        console.print(Panel(text, title="[bold blue]Энергии по запускам[/]", border_style="blue"))
 
     console.print(Rule(":sparkles: Вычисления завершены :sparkles:"))
     console.print("Нажмите Enter для выхода...")
     input()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,179 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from constants.file_paths import PLAN_CACHE_DIR, HAMILTONIAN_CACHE_DIR
+
+# Пакетный режим без интерактивного ввода и rich-вывода. Тяжелые модули (numpy, scipy)
+# импортируются только в процессах-исполнителях и только теми режимами, которым они нужны.
+
+JOB_FILE_SUFFIXES = (".json", ".yaml", ".yml")
+
+CSV_FIELDS = ["job", "seed", "optimizer", "backend", "energy", "error_bound", "reference_energy", "gap", "sector_reference_energy", "sector_gap",
+    "seconds", "status", "error", "theta"]
+
+def load_job_file(path: Path) -> List[Dict[str, Any]]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"Для чтения {path} требуется пакет PyYAML")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    jobs = data.get("jobs", [data]) if isinstance(data, dict) else data
+    if not isinstance(jobs, list):
+        raise ValueError(f"Файл {path} должен содержать задание, список заданий или ключ 'jobs'")
+    for index, job in enumerate(jobs):
+        job.setdefault("name", f"{path.stem}_{index + 1}" if len(jobs) > 1 else path.stem)
+        # Пути к гамильтонианам задаются относительно файла задания
+        hamiltonian = Path(job["hamiltonian"])
+        job["hamiltonian"] = str(hamiltonian if hamiltonian.is_absolute() else path.parent / hamiltonian)
+        if job.get("checkpoint"):
+            checkpoint = Path(job["checkpoint"])
+            job["checkpoint"] = str(checkpoint if checkpoint.is_absolute() else path.parent / checkpoint)
+    return jobs
+
+def new_record(name: str, seed: Optional[int], optimizer: str = "anneal", backend: str = "auto") -> Dict[str, Any]:
+    return {"job": name, "seed": seed, "optimizer": optimizer, "backend": backend, "energy": None, "error_bound": None,
+        "reference_energy": None, "gap": None, "sector_reference_energy": None, "sector_gap": None, "seconds": None,
+        "status": "ok", "error": "", "theta": None}
+
+def error_record(name: str, error: str) -> Dict[str, Any]:
+    return {**new_record(name, None), "status": "error", "error": error}
+
+def collect_jobs(paths: List[Path]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Ошибка в одном файле заданий не останавливает пакет: вместо его заданий в результаты попадает запись с ошибкой
+    jobs, errors = [], []
+    for path in paths:
+        files = sorted(p for p in path.iterdir() if p.suffix in JOB_FILE_SUFFIXES) if path.is_dir() else [path]
+        for file in files:
+            try:
+                jobs.extend(load_job_file(file))
+            except Exception as e:
+                errors.append(error_record(file.stem, f"{file}: {type(e).__name__}: {e}"))
+
+    # Имя задания - ключ порядка результатов и имени контрольной точки, поэтому задания с повторяющимся именем не запускаются
+    counts = Counter(job["name"] for job in jobs)
+    for name in (name for name, count in counts.items() if count > 1):
+        errors.append(error_record(name, f"ValueError: имя задания '{name}' повторяется (заданий: {counts[name]})"))
+    return [job for job in jobs if counts[job["name"]] == 1], errors
+
+def parse_ansatz(ansatz: List[Any]) -> List[Tuple[float, List[int]]]:
+    pauli_operators = []
+    for operator in ansatz:
+        if isinstance(operator, str):
+            coeff, indices = 1.0, [int(c) for c in operator.replace(" ", "")]
+        elif isinstance(operator, dict):
+            coeff, indices = float(operator.get("coeff", 1.0)), [int(c) for c in operator["indices"]]
+        else:
+            coeff, indices = 1.0, [int(c) for c in operator]
+        if any(x < 0 or x > 3 for x in indices):
+            raise ValueError("Индексы должны быть 0, 1, 2 или 3")
+        pauli_operators.append((coeff, indices))
+    if len(pauli_operators) < 2:
+        raise ValueError("Требуется минимум 2 оператора Паули")
+    if len({len(indices) for _, indices in pauli_operators}) > 1:
+        raise ValueError("Строки Паули анзаца должны иметь одинаковую длину")
+    return pauli_operators
+
+def run_task(job: Dict[str, Any], seed: int, telemetry: bool = False, plan_cache_dir: Optional[str] = None,
+    hamiltonian_cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    optimizer_params = dict(job.get("optimizer", {}))
+    record = new_record(job["name"], seed, optimizer_params.get("optimizer", "anneal"), optimizer_params.get("backend", "auto"))
+    start = time.perf_counter()
+    try:
+        import numpy as np
+        from utils.load_hamiltonian import load_hamiltonian
+        from vqa_utils.generate_shifted_theta import generate_shifted_theta
+        from vqa_utils.run_optimizer import run_optimizer
+        from vqa_utils.telemetry import TELEMETRY
+        from vqa_utils.plan_cache import configure_plan_cache
+
+        if telemetry:
+            TELEMETRY.enable()
+        if plan_cache_dir is not None:
+            configure_plan_cache(plan_cache_dir)
+
+        if job.get("checkpoint"):
+            # Повторный запуск того же задания (например, после вытеснения из очереди) продолжает прерванный отжиг
+            optimizer_params.update(checkpoint_path=Path(job["checkpoint"]) / f"{job['name']}_seed{seed}.json", resume=True)
+        pauli_operators = parse_ansatz(job["ansatz"])
+        hamiltonian_operators = load_hamiltonian(job["hamiltonian"], hamiltonian_cache_dir)
+        exact_energy, sector_energy = None, None
+        if job.get("reference") or job.get("stop_at_chemical_accuracy"):
+            from vqa_utils.reference_solver import reference_energies, chemical_accuracy_callback, CHEMICAL_ACCURACY
+
+            # Энергия основного состояния H и минимум в секторе симметрий анзаца; кэш общий для заданий с тем же гамильтонианом
+            exact_energy, sector_energy = reference_energies(pauli_operators, hamiltonian_operators)
+            if job.get("stop_at_chemical_accuracy") and sector_energy is not None:
+                # Остановка по достижимому анзацем минимуму: ниже сектора симметрий анзац не опускается
+                optimizer_params.setdefault("callback", chemical_accuracy_callback(sector_energy, float(job.get("tolerance", CHEMICAL_ACCURACY))))
+        # error_bound - строгая оценка погрешности энергии при backend: truncated, для точных бэкендов пусто
+        theta, energy, error_bound = run_optimizer(initial_theta=generate_shifted_theta(pauli_operators, np.random.default_rng(seed)),
+            pauli_operators=pauli_operators, hamiltonian_operators=hamiltonian_operators, progress=None, task=None,
+            seed=seed, verbose=False, return_error_bound=True, **optimizer_params)
+        record.update(energy=float(energy), error_bound=error_bound, theta=[float(t) for t in theta])
+        if exact_energy is not None:
+            record.update(reference_energy=exact_energy, gap=float(energy) - exact_energy)
+        if sector_energy is not None:
+            record.update(sector_reference_energy=sector_energy, sector_gap=float(energy) - sector_energy)
+        if telemetry:
+            # Замеры попадают только в results.json
+            record["telemetry"] = TELEMETRY.to_dict()
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+def write_results(records: List[Dict[str, Any]], output: Path) -> None:
+    output.mkdir(parents=True, exist_ok=True)
+    (output / "results.json").write_text(json.dumps(records, indent=2, ensure_ascii=False), encoding="utf-8")
+    with open(output / "results.csv", "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, "theta": " ".join(f"{t:.10f}" for t in record["theta"]) if record["theta"] else ""})
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетный запуск VQE по файлам заданий (JSON/YAML)")
+    parser.add_argument("jobs", nargs="+", type=Path, help="файлы заданий или папки с ними")
+    parser.add_argument("--output", type=Path, default=Path("results"), help="папка для results.json и results.csv")
+    parser.add_argument("--workers", type=int, default=None, help="число параллельных процессов")
+    parser.add_argument("--telemetry", action="store_true", help="добавить в results.json замеры этапов, размеров разложений и памяти")
+    parser.add_argument("--plan-cache", nargs="?", type=Path, const=PLAN_CACHE_DIR, default=None,
+        help=f"сохранять скомпилированные планы анзаца на диск для повторных запусков (по умолчанию в {PLAN_CACHE_DIR})")
+    parser.add_argument("--hamiltonian-cache", nargs="?", type=Path, const=HAMILTONIAN_CACHE_DIR, default=None,
+        help=f"сохранять разобранные гамильтонианы на диск, чтобы не разбирать файлы повторно (по умолчанию в {HAMILTONIAN_CACHE_DIR})")
+    args = parser.parse_args(argv)
+
+    jobs, errors = collect_jobs(args.jobs)
+    for record in errors:
+        print(f"{record['job']}: {record['error']}", file=sys.stderr, flush=True)
+    tasks = [(job, int(seed)) for job in jobs for seed in job.get("seeds", [0])]
+    if not tasks and not errors:
+        print("Задания не найдены", file=sys.stderr)
+        return 1
+
+    records: List[Dict[str, Any]] = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        cache_dirs = [str(directory) if directory is not None else None for directory in (args.plan_cache, args.hamiltonian_cache)]
+        futures = {executor.submit(run_task, job, seed, args.telemetry, *cache_dirs): i for i, (job, seed) in enumerate(tasks)}
+        for future in as_completed(futures):
+            record = records[futures[future]] = future.result()
+            energy = f"{record['energy']:.6f}" if record["energy"] is not None else record["error"]
+            print(f"{record['job']} (seed={record['seed']}): {energy}", flush=True)
+
+    records = errors + records
+    write_results(records, args.output)
+    return 0 if all(record["status"] == "ok" for record in records) else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+def evict_cache_files(directory: Path, max_bytes: int, pattern: str = "*.npz") -> None:
+    # Давно не использованные файлы (по времени изменения) удаляются, пока папка не уложится в max_bytes
+    files = []
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
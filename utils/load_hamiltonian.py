@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import numpy as np
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+from constants.pauli import PAULI_TO_XZ
+from utils.evict_cache_files import evict_cache_files
+from vqa_utils.pauli_sum import PauliSum, num_words
+from vqa_utils.telemetry import TELEMETRY
+
+# Число строк файла, разбираемых за один проход в упакованные массивы
+HAMILTONIAN_CHUNK_LINES = 1 << 16
+
+# Версия формата бинарного кэша гамильтониана
+HAMILTONIAN_CACHE_VERSION = 2
+
+# Предел размера папки бинарного кэша гамильтонианов (кэш включается передачей cache_dir)
+HAMILTONIAN_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+SPARSE_PAULI = {"I": 0, "X": 1, "Y": 2, "Z": 3}
+SPARSE_TOKEN = re.compile(r"^([IXYZ])(\d+)$")
+
+def parse_coefficient(tokens: List[str]) -> complex:
+    # "re im" или одно комплексное число в записи Python/OpenFermion: "(0.1+0.2j)"
+    if len(tokens) == 2:
+        return complex(float(tokens[0]), float(tokens[1]))
+    if len(tokens) == 1:
+        return complex(tokens[0].strip("()"))
+    raise ValueError("ожидался коэффициент 're im' или одно комплексное число")
+
+def parse_line(line: str) -> Tuple[complex, Union[str, List[Tuple[int, int]]]]:
+    # Плотная строка "re im 0312" или разреженная запись "re im X0 Z3" / "(re+imj) [X0 Z3] +"
+    line = line.rstrip("+").strip()
+    if "[" in line:
+        coeff_part, _, pauli_part = line.partition("[")
+        coeff = parse_coefficient(coeff_part.split())
+        tokens = pauli_part.replace("]", " ").split()
+    else:
+        parts = line.split()
+        if len(parts) < 3:
+            raise ValueError("ожидалось 're im строка_Паули'")
+        coeff = parse_coefficient(parts[:2])
+        tokens = parts[2:]
+        if len(tokens) == 1 and tokens[0].isdigit():
+            return coeff, tokens[0]
+    sparse, qubits = [], set()
+    for token in tokens:
+        if token == "I":
+            continue
+        match = SPARSE_TOKEN.match(token)
+        if match is None:
+            raise ValueError(f"некорректный оператор '{token}'")
+        qubit = int(match.group(2))
+        # Маски объединяются через OR, поэтому повтор кубита (X0 Z0, X0 X0) дал бы неверный оператор
+        if qubit in qubits:
+            raise ValueError(f"кубит {qubit} встречается в слагаемом более одного раза")
+        qubits.add(qubit)
+        sparse.append((qubit, SPARSE_PAULI[match.group(1)]))
+    return coeff, sparse
+
+def parse_chunk(lines: List[Tuple[int, str]]) -> Tuple[PauliSum, Optional[int]]:
+    coeffs = np.empty(len(lines), dtype=np.complex128)
+    dense_rows, dense_strings = [], []
+    sparse_rows, sparse_qubits, sparse_paulis = [], [], []
+    for row, (line_number, line) in enumerate(lines):
+        try:
+            coeffs[row], operator = parse_line(line)
+        except ValueError as e:
+            raise ValueError(f"Строка {line_number}: {e}") from None
+        if isinstance(operator, str):
+            dense_rows.append(row)
+            dense_strings.append(operator)
+        else:
+            for qubit, pauli in operator:
+                sparse_rows.append(row)
+                sparse_qubits.append(qubit)
+                sparse_paulis.append(pauli)
+
+    dense_width = None
+    if dense_strings:
+        dense_width = len(dense_strings[0])
+        if any(len(s) != dense_width for s in dense_strings):
+            raise ValueError("Плотные строки Паули в файле должны иметь одинаковую длину")
+    num_qubits = max(dense_width or 0, max(sparse_qubits, default=-1) + 1, 1)
+    words = num_words(num_qubits)
+    x = np.zeros((len(lines), words), dtype=np.uint64)
+    z = np.zeros((len(lines), words), dtype=np.uint64)
+
+    if dense_strings:
+        # Все плотные строки чанка разбираются одним frombuffer вместо списков символов
+        indices = np.frombuffer("".join(dense_strings).encode("ascii"), dtype=np.uint8).reshape(len(dense_strings), dense_width) - ord("0")
+        invalid = np.flatnonzero((indices > 3).any(axis=1))
+        if len(invalid):
+            raise ValueError(f"Строка {lines[dense_rows[invalid[0]]][0]}: индексы Паули должны быть 0, 1, 2 или 3")
+        dense = PauliSum.from_indices_array(indices, coeffs[dense_rows])
+        x[dense_rows, :dense.x.shape[1]] = dense.x
+        z[dense_rows, :dense.z.shape[1]] = dense.z
+    if sparse_rows:
+        table = np.array(PAULI_TO_XZ, dtype=np.uint64)
+        paulis = np.array(sparse_paulis)
+        word, shift = np.divmod(np.array(sparse_qubits, dtype=np.int64), 64)
+        position = (np.array(sparse_rows), word)
+        np.bitwise_or.at(x, position, table[paulis, 0] << shift.astype(np.uint64))
+        np.bitwise_or.at(z, position, table[paulis, 1] << shift.astype(np.uint64))
+    return PauliSum(x, z, coeffs, num_qubits), dense_width
+
+def iterate_chunks(file_path: Path, chunk_lines: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk = []
+    # Комментарии могут быть в любой кодировке, сами данные всегда ASCII
+    with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            chunk.append((line_number, line))
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def parse_hamiltonian_file(file_path: Path, chunk_lines: int = HAMILTONIAN_CHUNK_LINES) -> PauliSum:
+    chunks, dense_widths = [], set()
+    for lines in iterate_chunks(file_path, chunk_lines):
+        chunk, dense_width = parse_chunk(lines)
+        chunks.append(chunk)
+        if dense_width is not None:
+            dense_widths.add(dense_width)
+    if not chunks:
+        raise ValueError(f"Файл {file_path} не содержит слагаемых гамильтониана")
+    if len(dense_widths) > 1:
+        raise ValueError("Плотные строки Паули в файле должны иметь одинаковую длину")
+
+    num_qubits = max(chunk.num_qubits for chunk in chunks)
+    words = num_words(num_qubits)
+    x = np.zeros((sum(len(chunk) for chunk in chunks), words), dtype=np.uint64)
+    z = np.zeros_like(x)
+    start = 0
+    for chunk in chunks:
+        stop = start + len(chunk)
+        x[start:stop, :chunk.x.shape[1]] = chunk.x
+        z[start:stop, :chunk.z.shape[1]] = chunk.z
+        start = stop
+    return PauliSum(x, z, np.concatenate([chunk.coeffs for chunk in chunks]), num_qubits)
+
+def cache_path(file_path: Path, cache_dir: Path) -> Path:
+    return cache_dir / f"{hashlib.sha256(str(file_path.resolve()).encode()).hexdigest()}.npz"
+
+def source_stamp(file_path: Path) -> np.ndarray:
+    stat = file_path.stat()
+    return np.array([HAMILTONIAN_CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def load_cached(file_path: Path, cache_dir: Path) -> Optional[PauliSum]:
+    path = cache_path(file_path, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as arrays:
+            if not np.array_equal(arrays["stamp"], source_stamp(file_path)):
+                return None
+            hamiltonian = PauliSum(arrays["x"], arrays["z"], arrays["coeffs"], int(arrays["num_qubits"]))
+        # Время изменения отмечает последнее использование: по нему папка вытесняется
+        os.utime(path)
+        return hamiltonian
+    except (OSError, KeyError, ValueError):
+        return None
+
+def store_cached(file_path: Path, cache_dir: Path, hamiltonian: PauliSum, max_cache_bytes: int = HAMILTONIAN_CACHE_MAX_BYTES) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        path = cache_path(file_path, cache_dir)
+        temporary = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(temporary, stamp=source_stamp(file_path), num_qubits=hamiltonian.num_qubits,
+            x=hamiltonian.x, z=hamiltonian.z, coeffs=hamiltonian.coeffs)
+        os.replace(temporary, path)
+        # Файлы перемещенных или удаленных источников больше не читаются и со временем вытесняются
+        evict_cache_files(cache_dir, max_cache_bytes)
+    except OSError:
+        pass
+
+def load_hamiltonian(file_path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None,
+    chunk_lines: int = HAMILTONIAN_CHUNK_LINES, max_cache_bytes: int = HAMILTONIAN_CACHE_MAX_BYTES) -> PauliSum:
+    # Слагаемые сохраняются в порядке файла, включая нулевые; слияние и отсев - задача предобработки.
+    # cache_dir (например, HAMILTONIAN_CACHE_DIR) включает бинарный кэш разобранного файла размером до max_cache_bytes
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Файл {file_path} не найден.")
+    cache_dir = Path(cache_dir) if cache_dir is not None else None
+    with TELEMETRY.stage("parsing"):
+        hamiltonian = load_cached(file_path, cache_dir) if cache_dir is not None else None
+        if hamiltonian is None:
+            hamiltonian = parse_hamiltonian_file(file_path, chunk_lines)
+            if cache_dir is not None:
+                store_cached(file_path, cache_dir, hamiltonian, max_cache_bytes)
+    TELEMETRY.size("hamiltonian_terms", len(hamiltonian))
+    return hamiltonian
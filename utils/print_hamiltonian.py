@@ -1,14 +1,28 @@
+import numpy as np
 from rich.console import Console
 from rich.panel import Panel
-from typing import Tuple, List
+from typing import Tuple, List, Union
+from vqa_utils.pauli_sum import PauliSum
 from .get_operator_for_console import get_operator_for_console
 from .console_and_print import console_and_print
 
-def print_hamiltonian(console: Console, pauli_operators: List[Tuple[complex, List[int]]]) -> None:
-   
+# Наибольшее число выводимых слагаемых: для больших гамильтонианов строится и печатается только начало
+MAX_PRINTED_TERMS = 200
+
+def print_hamiltonian(console: Console, pauli_operators: Union[List[Tuple[complex, List[int]]], PauliSum]) -> None:
+    if isinstance(pauli_operators, PauliSum):
+        nonzero = np.flatnonzero(pauli_operators.coeffs != 0)
+        shown = PauliSum(pauli_operators.x[nonzero[:MAX_PRINTED_TERMS]], pauli_operators.z[nonzero[:MAX_PRINTED_TERMS]],
+            pauli_operators.coeffs[nonzero[:MAX_PRINTED_TERMS]], pauli_operators.num_qubits)
+        terms, total = shown.to_terms(), len(nonzero)
+    else:
+        terms, total = pauli_operators[:MAX_PRINTED_TERMS], len(pauli_operators)
+
     hamiltonian_str = "H = " + " + ".join(
-        [get_operator_for_console(c, ''.join(map(str, i))) for c, i in pauli_operators]
+        [get_operator_for_console(c, ''.join(map(str, i))) for c, i in terms]
     )
+    if total > len(terms):
+        hamiltonian_str += f" + ... (еще {total - len(terms)} слагаемых)"
     console_and_print(
         console,
         Panel(
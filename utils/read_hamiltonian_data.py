@@ -1,24 +1,15 @@
 import numpy as np
 from typing import List, Tuple
-from .read_file_lines import read_file_lines
+from .load_hamiltonian import load_hamiltonian
 
 def read_hamiltonian_data(file_path) -> Tuple[List[Tuple[complex, List[int]]], List[List[int]]]:
 
-    lines = read_file_lines(file_path, ignore_comments=False)
-    pauli_operators: List[Tuple[complex, List[int]]] = []
-    pauli_strings: List[List[int]] = []
-    for line in lines:
-        parts = line.strip().split()
-        if len(parts) == 3:
-            real_part, imag_part, index_str = (
-                float(parts[0]),
-                float(parts[1]),
-                str(parts[2]),
-            )
-            coefficient = np.complex128(real_part + imag_part * 1j)
-            index_list = [int(c) for c in index_str]
-            if coefficient != 0:
-                pauli_operators.append((coefficient, index_list))
-            pauli_strings.append(index_list)
-            
+    hamiltonian = load_hamiltonian(file_path)
+    pauli_strings: List[List[int]] = hamiltonian.to_indices_array().tolist()
+    pauli_operators: List[Tuple[complex, List[int]]] = [
+        (np.complex128(coefficient), index_list)
+        for coefficient, index_list in zip(hamiltonian.coeffs, pauli_strings)
+        if coefficient != 0
+    ]
+
     return pauli_operators, pauli_strings
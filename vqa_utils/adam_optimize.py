@@ -0,0 +1,32 @@
+import numpy as np
+from typing import Any, Tuple
+
+def adam_optimize(initial_theta: np.ndarray, backend: Any, progress: Any = None, task: Any = None, max_iterations: int = 200,
+    learning_rate: float = 0.05, beta1: float = 0.9, beta2: float = 0.999, epsilon: float = 1e-8, tolerance: float = 1e-6, verbose: bool = True) -> Tuple[np.ndarray, float]:
+    if progress is not None:
+        progress.reset(task, total=max_iterations)
+
+    theta = np.array(initial_theta, dtype=np.float64)
+    first_moment = np.zeros_like(theta)
+    second_moment = np.zeros_like(theta)
+    best_theta, best_energy = theta.copy(), float("inf")
+
+    for iteration in range(1, max_iterations + 1):
+        energy, gradient = backend.energy_and_gradient(theta)
+        if energy < best_energy:
+            best_theta, best_energy = theta.copy(), energy
+        if np.linalg.norm(gradient) < tolerance:
+            break
+        first_moment = beta1 * first_moment + (1 - beta1) * gradient
+        second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+        corrected_first = first_moment / (1 - beta1 ** iteration)
+        corrected_second = second_moment / (1 - beta2 ** iteration)
+        theta -= learning_rate * corrected_first / (np.sqrt(corrected_second) + epsilon)
+        if progress is not None:
+            progress.update(task, advance=1)
+
+    if progress is not None:
+        progress.update(task, completed=max_iterations)
+    if verbose:
+        print(f"Финальная лучшая энергия (Adam): {best_energy:.6f}")
+    return best_theta % (2 * np.pi), best_energy
@@ -0,0 +1,150 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from .pauli_sum import PauliSum, PHASES, MULTIPLY_BLOCK_SIZE, mask_keys, compose_mask_arrays
+from .popcount import popcount
+from .preprocess_hamiltonian import group_by_x_mask
+from .telemetry import TELEMETRY
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+class AnsatzPlan:
+    # Символьная часть вычисления энергии, зависящая только от строк Паули анзаца и гамильтониана:
+    #   steps       - для каждого поворота R_k: куда переходят слагаемые при умножении на cos и на i·sin·P_k и с какой фазой;
+    #   projection  - (слагаемое U -> базисное состояние |x>, фаза i^{x·z}) для U|0...0>;
+    #   hamiltonian - (строка, столбец, номер слагаемого H, фаза) ограничения H на носитель U|0...0>.
+    # Значения theta и коэффициенты подставляются при каждом вычислении.
+
+    def __init__(self, num_qubits: int, steps: List[Tuple[np.ndarray, np.ndarray, np.ndarray, int]], projection: Tuple[np.ndarray, np.ndarray, int],
+        hamiltonian: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]):
+        self.num_qubits = num_qubits
+        self.steps = steps
+        self.projection = projection
+        self.hamiltonian = hamiltonian
+        self._bound_coeffs = None
+        self._bound_matrix = None
+        self._projection_matrix = None
+
+    @classmethod
+    def compile(cls, operators: PauliSum, hamiltonian: PauliSum) -> "AnsatzPlan":
+        if operators.num_qubits != hamiltonian.num_qubits:
+            raise ValueError("Число кубитов анзаца и гамильтониана должно совпадать")
+        with TELEMETRY.stage("ansatz_expansion"):
+            steps, current = cls._compile_steps(operators)
+        with TELEMETRY.stage("uhu_composition"):
+            return cls._compile_hamiltonian(steps, current, hamiltonian)
+
+    @staticmethod
+    def _compile_steps(operators: PauliSum) -> Tuple[List[Tuple[np.ndarray, np.ndarray, np.ndarray, int]], PauliSum]:
+        num_qubits = operators.num_qubits
+        current = PauliSum.identity(num_qubits)
+        steps = []
+        for k in range(len(operators)):
+            power, product_x, product_z = compose_mask_arrays(current.x, current.z, operators.x[k:k + 1], operators.z[k:k + 1])
+            combined = PauliSum(np.concatenate([current.x, product_x]), np.concatenate([current.z, product_z]),
+                np.zeros(2 * len(current)), num_qubits)
+            _, first, inverse = np.unique(combined.row_keys(), return_index=True, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            steps.append((inverse[:len(current)], inverse[len(current):], PHASES[power], len(first)))
+            current = PauliSum(combined.x[first], combined.z[first], np.zeros(len(first)), num_qubits)
+        return steps, current
+
+    @classmethod
+    def _compile_hamiltonian(cls, steps: List[Tuple[np.ndarray, np.ndarray, np.ndarray, int]], current: PauliSum,
+        hamiltonian: PauliSum) -> "AnsatzPlan":
+        num_qubits = current.num_qubits
+
+        # U|0...0> = Σ_k u_k i^{x_k·z_k} |x_k>
+        support_keys, support_index = np.unique(mask_keys(current.x, np.zeros_like(current.x), num_qubits), return_inverse=True)
+        support_index = support_index.reshape(-1)
+        support_x = np.zeros((len(support_keys), current.x.shape[1]), dtype=np.uint64)
+        support_x[support_index] = current.x
+        projection = (support_index, PHASES[popcount(current.x & current.z).sum(axis=-1) & 3], len(support_keys))
+
+        # Поиск образов носителя выполняется один раз на группу X-масок, а не на каждое слагаемое
+        group_x, group_index = group_by_x_mask(hamiltonian)
+        group_positions, group_found = [], []
+        block_rows = max(1, MULTIPLY_BLOCK_SIZE // len(support_keys))
+        for start in range(0, len(group_x), block_rows):
+            target_x = (group_x[start:start + block_rows, None, :] ^ support_x[None, :, :]).reshape(-1, support_x.shape[1])
+            target_keys = mask_keys(target_x, np.zeros_like(target_x), num_qubits)
+            positions = np.searchsorted(support_keys, target_keys).clip(max=len(support_keys) - 1)
+            group_positions.append(positions.reshape(-1, len(support_keys)))
+            group_found.append((support_keys[positions] == target_keys).reshape(-1, len(support_keys)))
+        group_positions, group_found = np.concatenate(group_positions), np.concatenate(group_found)
+
+        rows, cols, terms, phases = [], [], [], []
+        h_phases = PHASES[popcount(hamiltonian.x & hamiltonian.z).sum(axis=-1) & 3]
+        for start in range(0, len(hamiltonian), block_rows):
+            block = slice(start, start + block_rows)
+            block_groups = group_index[block]
+            found = group_found[block_groups]
+            signs = 1 - 2 * (popcount(hamiltonian.z[block, None, :] & support_x[None, :, :]).sum(axis=-1) & 1)
+            block_terms, block_cols = np.nonzero(found)
+            rows.append(group_positions[block_groups][found])
+            cols.append(block_cols)
+            terms.append(block_terms + start)
+            phases.append(h_phases[block_terms + start] * signs[found])
+
+        return cls(num_qubits, steps, projection, tuple(np.concatenate(parts) for parts in (rows, cols, terms, phases)))
+
+    @property
+    def num_terms(self) -> int:
+        return len(self.projection[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.to_arrays().values())
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"num_qubits": np.array(self.num_qubits), "num_steps": np.array(len(self.steps)),
+            "support_index": self.projection[0], "support_phase": self.projection[1], "support_size": np.array(self.projection[2])}
+        for k, (keep, flip, phase, size) in enumerate(self.steps):
+            arrays.update({f"keep_{k}": keep, f"flip_{k}": flip, f"phase_{k}": phase, f"size_{k}": np.array(size)})
+        for name, array in zip(("h_rows", "h_cols", "h_terms", "h_phases"), self.hamiltonian):
+            arrays[name] = array
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "AnsatzPlan":
+        steps = [(arrays[f"keep_{k}"], arrays[f"flip_{k}"], arrays[f"phase_{k}"], int(arrays[f"size_{k}"])) for k in range(int(arrays["num_steps"]))]
+        projection = (arrays["support_index"], arrays["support_phase"], int(arrays["support_size"]))
+        hamiltonian = tuple(arrays[name] for name in ("h_rows", "h_cols", "h_terms", "h_phases"))
+        return cls(int(arrays["num_qubits"]), steps, projection, hamiltonian)
+
+    def projection_matrix(self) -> "sparse.csr_matrix":
+        # scipy импортируется только при первом вычислении, чтобы не замедлять запуск режимов без него
+        from scipy import sparse
+        if self._projection_matrix is None:
+            support_index, support_phase, size = self.projection
+            self._projection_matrix = sparse.csr_matrix((support_phase, (np.arange(len(support_index)), support_index)), shape=(len(support_index), size))
+        return self._projection_matrix
+
+    def hamiltonian_matrix(self, h_coeffs: np.ndarray) -> "sparse.csr_matrix":
+        # Подстановка коэффициентов гамильтониана в заранее вычисленные индексы и фазы
+        from scipy import sparse
+        if self._bound_coeffs is None or not np.array_equal(self._bound_coeffs, h_coeffs):
+            rows, cols, terms, phases = self.hamiltonian
+            size = self.projection[2]
+            self._bound_matrix = sparse.csr_matrix((h_coeffs[terms] * phases, (rows, cols)), shape=(size, size))
+            self._bound_coeffs = np.array(h_coeffs, copy=True)
+        return self._bound_matrix
+
+    def ansatz_coefficients(self, angles: np.ndarray) -> np.ndarray:
+        # Коэффициенты U(θ) для пакета углов [B, P]: свертка фиксированных таблиц с cos/sin
+        coefficients = np.ones((len(angles), 1), dtype=np.complex128)
+        for k, (keep, flip, phase, size) in enumerate(self.steps):
+            updated = np.zeros((len(angles), size), dtype=np.complex128)
+            updated[:, keep] = coefficients * np.cos(angles[:, k, None])
+            updated[:, flip] += coefficients * (1j * np.sin(angles[:, k, None]) * phase[None, :])
+            coefficients = updated
+        return coefficients
+
+    def energies(self, angles: np.ndarray, h_coeffs: np.ndarray) -> np.ndarray:
+        angles = np.atleast_2d(angles)
+        with TELEMETRY.stage("ansatz_expansion"):
+            coefficients = self.ansatz_coefficients(angles)
+        with TELEMETRY.stage("expectation"):
+            states = (self.projection_matrix().T @ coefficients.T).T
+            applied = (self.hamiltonian_matrix(h_coeffs) @ states.T).T
+            return np.einsum("bi,bi->b", states.conj(), applied).real
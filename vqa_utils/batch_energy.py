@@ -0,0 +1,16 @@
+import numpy as np
+from typing import List, Optional, Tuple, Union
+from .ansatz_plan import AnsatzPlan
+from .plan_cache import get_ansatz_plan
+from .pauli_sum import PauliSum
+
+def batch_energy(thetas: np.ndarray, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum],
+    plan: Optional[AnsatzPlan] = None) -> np.ndarray:
+    thetas = np.atleast_2d(np.asarray(thetas, dtype=np.float64))
+    if thetas.shape[1] != len(pauli_operators):
+        raise ValueError("Размеры theta и pauli_operators должны совпадать")
+    hamiltonian = hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian)
+    if plan is None:
+        plan = get_ansatz_plan(PauliSum.from_terms(pauli_operators), hamiltonian)
+    coeffs = np.array([c for c, _ in pauli_operators])
+    return plan.energies(thetas * coeffs[None, :], hamiltonian.coeffs)
@@ -0,0 +1,50 @@
+import numpy as np
+from typing import Tuple, List, Dict, Union
+from .pauli_sum import PauliSum, PHASES, MULTIPLY_BLOCK_SIZE, mask_keys
+from .popcount import popcount
+from .preprocess_hamiltonian import group_by_x_mask
+from .telemetry import TELEMETRY
+
+def apply_to_zero_state(u_sum: PauliSum) -> Tuple[np.ndarray, np.ndarray]:
+    # P(x, z)|0...0> = i^{x·z}|x>, поэтому U|0...0> группируется по X-маскам слагаемых
+    amplitudes = u_sum.coeffs * PHASES[popcount(u_sum.x & u_sum.z).sum(axis=-1) & 3]
+    state = PauliSum(u_sum.x, np.zeros_like(u_sum.z), amplitudes, u_sum.num_qubits).simplify()
+    return state.x, state.coeffs
+
+def calculate_energy(u_sum: Union[Dict[Tuple[int, ...], complex], PauliSum], h_sum: Union[List[Tuple[complex, List[int]]], PauliSum]) -> float:
+    with TELEMETRY.stage("expectation"):
+        return _calculate_energy(u_sum, h_sum)
+
+def _calculate_energy(u_sum: Union[Dict[Tuple[int, ...], complex], PauliSum], h_sum: Union[List[Tuple[complex, List[int]]], PauliSum]) -> float:
+    # <0|U†HU|0> = Σ_h c_h i^{x_h·z_h} Σ_b conj(ψ[b ^ x_h]) (-1)^{z_h·b} ψ[b], без построения U†HU
+    u_sum = u_sum if isinstance(u_sum, PauliSum) else PauliSum.from_dict(u_sum)
+    h_sum = h_sum if isinstance(h_sum, PauliSum) else PauliSum.from_terms(h_sum)
+    num_qubits = u_sum.num_qubits
+    state_x, amplitudes = apply_to_zero_state(u_sum)
+    if len(amplitudes) == 0:
+        return 0.0
+    words = state_x.shape[1]
+    keys = mask_keys(state_x, np.zeros_like(state_x), num_qubits)
+    h_coeffs = h_sum.coeffs * PHASES[popcount(h_sum.x & h_sum.z).sum(axis=-1) & 3]
+
+    # Переходы |b> -> |b ^ x> ищутся один раз на группу X-масок: w_x[b] = conj(ψ[b ^ x]) ψ[b]
+    group_x, group_index = group_by_x_mask(h_sum)
+    order = np.argsort(group_index, kind="stable")
+    group_bounds = np.searchsorted(group_index[order], np.arange(len(group_x) + 1))
+    block_rows = max(1, MULTIPLY_BLOCK_SIZE // len(keys))
+
+    energy = 0j
+    for group_start in range(0, len(group_x), block_rows):
+        group_stop = min(group_start + block_rows, len(group_x))
+        target_x = (group_x[group_start:group_stop, None, :] ^ state_x[None, :, :]).reshape(-1, words)
+        target_keys = mask_keys(target_x, np.zeros_like(target_x), num_qubits)
+        positions = np.searchsorted(keys, target_keys).clip(max=len(keys) - 1)
+        bra = np.where(keys[positions] == target_keys, amplitudes[positions].conj(), 0).reshape(-1, len(keys))
+        overlaps = bra * amplitudes[None, :]
+        group_terms = order[group_bounds[group_start]:group_bounds[group_stop]]
+        for start in range(0, len(group_terms), block_rows):
+            block = group_terms[start:start + block_rows]
+            signs = 1 - 2 * (popcount(h_sum.z[block, None, :] & state_x[None, :, :]).sum(axis=-1) & 1)
+            energy += np.sum(h_coeffs[block, None] * signs * overlaps[group_index[block] - group_start])
+
+    return float(energy.real)
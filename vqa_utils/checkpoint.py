@@ -0,0 +1,45 @@
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# Версия формата файла контрольной точки
+CHECKPOINT_FORMAT_VERSION = 2
+
+# Интервал записи контрольных точек по умолчанию, в температурных уровнях отжига
+CHECKPOINT_INTERVAL = 10
+
+def save_checkpoint(path: Union[str, Path], state: Dict[str, Any]) -> None:
+    # Запись через временный файл и os.replace: прерванный процесс не оставляет поврежденный файл
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps({"version": CHECKPOINT_FORMAT_VERSION, **state}, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, path)
+
+def load_checkpoint(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state.get("version") != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError(f"Контрольная точка {path} записана в другом формате (версия {state.get('version')})")
+    return state
+
+class AnnealingCheckpoint:
+    # Сохранение состояния отжига: текущие и лучшие theta, история лучших энергий,
+    # номер температурного уровня и температура; состояние генератора передается в extra
+
+    def __init__(self, path: Union[str, Path], num_iterations: int):
+        self.path = Path(path)
+        self.num_iterations = num_iterations
+        self.history: List[float] = []
+
+    def save(self, iteration: int, temperature: float, theta: np.ndarray, energy: Union[float, np.ndarray], best_theta: Optional[np.ndarray], best_energy: float,
+        done: bool = False, **extra: Any) -> None:
+        self.history.append(float(best_energy))
+        save_checkpoint(self.path, {"status": "done" if done else "running", "iteration": iteration, "num_iterations": self.num_iterations,
+            "temperature": float(temperature), "theta": np.asarray(theta, dtype=np.float64).tolist(), "energy": np.asarray(energy, dtype=np.float64).tolist(),
+            "best_theta": None if best_theta is None else np.asarray(best_theta, dtype=np.float64).tolist(), "best_energy": float(best_energy),
+            "history": self.history, **extra})
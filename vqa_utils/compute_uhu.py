@@ -1,17 +1,14 @@
-import numpy as np
-from typing import Tuple, List, Dict
-from .pauli_compose import pauli_compose
+from typing import Tuple, List, Dict, Union
+from .pauli_sum import PauliSum
+from .telemetry import TELEMETRY
 
-def compute_uhu(u_dict: Dict[Tuple[int, ...], complex], h_terms: List[Tuple[complex, List[int]]]) -> Dict[Tuple[int, ...], complex]:
-    uhu_dict: Dict[Tuple[int, ...], complex] = {}
-    u_items = list(u_dict.items())
-    for coeff_h, op_h in h_terms:
-        op_h_tuple = tuple(op_h)
-        for j_op, j_coeff in u_items:
-            conj_j_coeff = np.conj(j_coeff)
-            c1, op_uh = pauli_compose(j_op, op_h_tuple)
-            for k_op, k_coeff in u_items:
-                c2, op_uhu = pauli_compose(op_uh, k_op)
-                total_coeff = conj_j_coeff * k_coeff * coeff_h * c1 * c2
-                uhu_dict[op_uhu] = uhu_dict.get(op_uhu, 0) + total_coeff
-    return uhu_dict
+def compute_uhu_sum(u_sum: PauliSum, h_sum: PauliSum) -> PauliSum:
+    with TELEMETRY.stage("uhu_composition"):
+        uhu = u_sum.adjoint().multiply(h_sum).multiply(u_sum)
+    TELEMETRY.size("uhu_terms", len(uhu))
+    return uhu
+
+def compute_uhu(u_dict: Union[Dict[Tuple[int, ...], complex], PauliSum], h_terms: Union[List[Tuple[complex, List[int]]], PauliSum]) -> Dict[Tuple[int, ...], complex]:
+    u_sum = u_dict if isinstance(u_dict, PauliSum) else PauliSum.from_dict(u_dict)
+    h_sum = h_terms if isinstance(h_terms, PauliSum) else PauliSum.from_terms(h_terms)
+    return compute_uhu_sum(u_sum, h_sum).to_dict()
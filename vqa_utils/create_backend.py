@@ -0,0 +1,41 @@
+from typing import Any, List, Tuple, Union
+from .pauli_sum import PauliSum
+from .preprocess_hamiltonian import compress_hamiltonian, group_by_x_mask
+from .pauli_backend import PauliBackend
+from .statevector_backend import StatevectorBackend
+from .incremental_backend import IncrementalPauliBackend
+from .truncated_backend import TruncatedPauliBackend
+
+BACKENDS = {"pauli": PauliBackend, "statevector": StatevectorBackend, "incremental": IncrementalPauliBackend,
+    "truncated": TruncatedPauliBackend}
+
+# Вектор состояния из 2^n амплитуд разумен только до этого числа кубитов
+MAX_STATEVECTOR_QUBITS = 26
+
+# Накладные расходы одного вызова numpy (поворот, перестановка) в единицах операций над амплитудами
+STEP_OVERHEAD = 600
+
+# Постоянная часть вычисления по плану разложения (привязка коэффициентов, разреженные произведения)
+PAULI_BASE_OVERHEAD = 8000
+
+def select_backend(num_qubits: int, num_parameters: int, num_groups: int = 1) -> str:
+    # Разложение по строкам Паули содержит до min(2^P, 4^n) слагаемых, а ограничение H на носитель U|0...0>
+    # из до min(2^P, 2^n) состояний - не более одной перестановки на каждую группу X-масок.
+    # Вектор состояния требует P поворотов и G перестановок по 2^n амплитуд
+    if num_qubits > MAX_STATEVECTOR_QUBITS:
+        return "pauli"
+    support = min(2 ** num_parameters, 2 ** num_qubits)
+    pauli_cost = PAULI_BASE_OVERHEAD + num_parameters * STEP_OVERHEAD + 4 * min(2 ** num_parameters, 4 ** num_qubits) + support * num_groups // 2
+    statevector_cost = (num_parameters + num_groups) * (2 ** num_qubits + STEP_OVERHEAD)
+    return "statevector" if pauli_cost > statevector_cost else "pauli"
+
+def create_backend(backend: Any, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum]):
+    # Уже созданный бэкенд (например, с настроенным отсечением) передается дальше без изменений
+    if not isinstance(backend, str):
+        return backend
+    hamiltonian = compress_hamiltonian(hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian))
+    if backend == "auto":
+        backend = select_backend(hamiltonian.num_qubits, len(pauli_operators), len(group_by_x_mask(hamiltonian)[0]))
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд '{backend}'. Доступны: auto, {', '.join(BACKENDS)}")
+    return BACKENDS[backend](pauli_operators, hamiltonian)
@@ -0,0 +1,114 @@
+import numpy as np
+from typing import Optional, Tuple, List
+from .pauli_sum import PauliSum, PHASES, compose_mask_arrays, labeled_mask_keys
+from .popcount import popcount
+from .calculate_energy import apply_to_zero_state
+from .telemetry import TELEMETRY
+
+def pauli_rotation(operators: PauliSum, k: int, angle: float) -> PauliSum:
+    # exp(iαP) = cos(α)·I + i·sin(α)·P
+    identity = PauliSum.identity(operators.num_qubits)
+    return PauliSum(np.concatenate([identity.x, operators.x[k:k + 1]]), np.concatenate([identity.z, operators.z[k:k + 1]]),
+        [np.cos(angle), 1j * np.sin(angle)], operators.num_qubits)
+
+def validate_threshold(threshold: float) -> None:
+    # Σ|c|^2 = Tr(U†U)/2^n = 1 для унитарного U, поэтому |c| <= 1 и порог от 1 отбросил бы все слагаемые
+    if not 0 <= threshold < 1:
+        raise ValueError(f"Порог отсечения должен лежать в интервале [0, 1), получено {threshold}")
+
+def truncation_mask(labels: np.ndarray, magnitudes: np.ndarray, threshold: float = 0.0, max_terms: Optional[int] = None) -> np.ndarray:
+    # Для каждой метки (точки пакета) сохраняются слагаемые с |c| > threshold, но не больше max_terms наибольших;
+    # наибольшее слагаемое сохраняется всегда, чтобы разложение не стало пустым
+    order = np.lexsort((-magnitudes, labels))
+    sorted_labels = labels[order]
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - np.searchsorted(sorted_labels, sorted_labels)
+    keep = (magnitudes > threshold) | (rank == 0)
+    if max_terms is not None:
+        keep &= rank < max_terms
+    return keep
+
+def truncate_terms(terms: PauliSum, threshold: float = 0.0, max_terms: Optional[int] = None) -> Tuple[PauliSum, PauliSum]:
+    keep = truncation_mask(np.zeros(len(terms), dtype=np.int64), np.abs(terms.coeffs), threshold, max_terms)
+    return (PauliSum(terms.x[keep], terms.z[keep], terms.coeffs[keep], terms.num_qubits),
+        PauliSum(terms.x[~keep], terms.z[~keep], terms.coeffs[~keep], terms.num_qubits))
+
+def expand_ansatz_truncated(theta: np.ndarray, pauli_operators: List[Tuple[complex, List[int]]], threshold: float = 0.0,
+    max_terms: Optional[int] = None) -> Tuple[PauliSum, float]:
+    # Произведение собирается справа: Ũ_k = trunc(R_k Ũ_{k+1}) = R_k Ũ_{k+1} - E_k. Тогда
+    # U|0> - Ũ|0> = Σ_k R_1...R_{k-1} E_k|0>, и так как R_j унитарны, ||U|0> - Ũ|0>|| <= Σ_k ||E_k|0>|| = δ
+    if len(theta) != len(pauli_operators):
+        raise ValueError("Размеры theta и pauli_operators должны совпадать")
+    if max_terms is not None and max_terms < 1:
+        raise ValueError("Число сохраняемых слагаемых должно быть положительным")
+    validate_threshold(threshold)
+
+    operators = PauliSum.from_terms(pauli_operators)
+    result = PauliSum.identity(operators.num_qubits)
+    discarded_norm = 0.0
+
+    with TELEMETRY.stage("ansatz_expansion"):
+        for i in reversed(range(len(pauli_operators))):
+            result, discarded = truncate_terms(pauli_rotation(operators, i, theta[i] * pauli_operators[i][0]).multiply(result), threshold, max_terms)
+            if len(discarded):
+                discarded_norm += float(np.linalg.norm(apply_to_zero_state(discarded)[1]))
+    TELEMETRY.size("ansatz_terms", len(result))
+
+    return result, discarded_norm
+
+def expand_ansatz_truncated_batch(angles: np.ndarray, operators: PauliSum, threshold: float = 0.0,
+    max_terms: Optional[int] = None) -> Tuple[np.ndarray, PauliSum, np.ndarray]:
+    # Пакетный вариант expand_ansatz_truncated для углов α [B, P]: слагаемые всех точек хранятся в одной PauliSum
+    # с меткой точки labels, поэтому каждый поворот - одно векторное умножение на весь пакет.
+    # Отсечение и отброшенная норма δ_b считаются для каждой точки отдельно
+    angles = np.atleast_2d(angles)
+    if angles.shape[1] != len(operators):
+        raise ValueError("Размеры theta и pauli_operators должны совпадать")
+    if max_terms is not None and max_terms < 1:
+        raise ValueError("Число сохраняемых слагаемых должно быть положительным")
+    validate_threshold(threshold)
+
+    num_points, num_qubits = len(angles), operators.num_qubits
+    words = operators.x.shape[1]
+    labels = np.arange(num_points)
+    terms = PauliSum(np.zeros((num_points, words)), np.zeros((num_points, words)), np.ones(num_points), num_qubits)
+    discarded_norms = np.zeros(num_points)
+
+    with TELEMETRY.stage("ansatz_expansion"):
+        for k in reversed(range(len(operators))):
+            # R_k Ũ = cos(α)·Ũ + i·sin(α)·P_k Ũ, затем слияние одинаковых строк внутри каждой точки
+            power, product_x, product_z = compose_mask_arrays(operators.x[k:k + 1], operators.z[k:k + 1], terms.x, terms.z)
+            point_angles = angles[labels, k]
+            labels = np.concatenate([labels, labels])
+            x, z = np.concatenate([terms.x, product_x]), np.concatenate([terms.z, product_z])
+            coeffs = np.concatenate([terms.coeffs * np.cos(point_angles), 1j * np.sin(point_angles) * terms.coeffs * PHASES[power]])
+            _, first, inverse = np.unique(labeled_mask_keys(labels, x, z, num_qubits), return_index=True, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            coeffs = (np.bincount(inverse, weights=coeffs.real, minlength=len(first))
+                + 1j * np.bincount(inverse, weights=coeffs.imag, minlength=len(first)))
+            labels, x, z = labels[first], x[first], z[first]
+
+            keep = truncation_mask(labels, np.abs(coeffs), threshold, max_terms)
+            if not keep.all():
+                discarded = ~keep
+                discarded_x = x[discarded]
+                amplitudes = coeffs[discarded] * PHASES[popcount(discarded_x & z[discarded]).sum(axis=-1) & 3]
+                _, state_first, state_index = np.unique(labeled_mask_keys(labels[discarded], discarded_x, None, num_qubits),
+                    return_index=True, return_inverse=True)
+                state_index = state_index.reshape(-1)
+                state = (np.bincount(state_index, weights=amplitudes.real, minlength=len(state_first))
+                    + 1j * np.bincount(state_index, weights=amplitudes.imag, minlength=len(state_first)))
+                discarded_norms += np.sqrt(np.bincount(labels[discarded][state_first], weights=np.abs(state) ** 2, minlength=num_points))
+            labels, terms = labels[keep], PauliSum(x[keep], z[keep], coeffs[keep], num_qubits)
+    TELEMETRY.size("ansatz_terms", int(np.bincount(labels, minlength=num_points).max()))
+
+    return labels, terms, discarded_norms
+
+def expand_ansatz(theta: np.ndarray, pauli_operators: List[Tuple[complex, List[int]]]) -> PauliSum:
+    # Точное разложение: отбрасываются только слагаемые, сократившиеся до нуля
+    return expand_ansatz_truncated(theta, pauli_operators)[0]
+
+def energy_error_bound(discarded_norm: float, hamiltonian: PauliSum, state_norm: Optional[float] = None) -> float:
+    # При ||ψ|| = 1, ||ψ - φ|| <= δ: |<ψ|H|ψ> - <φ|H|φ>| <= ||H|| δ (1 + ||φ||), где ||φ|| <= 1 + δ и ||H|| <= Σ|h|
+    state_norm = 1 + discarded_norm if state_norm is None else state_norm
+    return float(np.abs(hamiltonian.coeffs).sum() * discarded_norm * (1 + state_norm))
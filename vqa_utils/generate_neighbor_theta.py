@@ -1,6 +1,9 @@
 import numpy as np
+from typing import Optional
 
-def generate_neighbor_theta(current_theta: np.ndarray, step_size: float = 0.05) -> np.ndarray:
-    perturbation = np.random.normal(scale=step_size, size=current_theta.shape)
+def generate_neighbor_theta(current_theta: np.ndarray, step_size: float = 0.05, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    # Без rng используется новый генератор без seed, глобальное состояние np.random не затрагивается
+    rng = rng if rng is not None else np.random.default_rng()
+    perturbation = rng.normal(scale=step_size, size=current_theta.shape)
     
     return (current_theta + perturbation) % (2*np.pi)
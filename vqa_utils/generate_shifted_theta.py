@@ -1,7 +1,7 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-def generate_shifted_theta(pauli_operators: List[Tuple[complex, List[int]]]) -> np.ndarray:
+def generate_shifted_theta(pauli_operators: List[Tuple[complex, List[int]]], rng: Optional[np.random.Generator] = None) -> np.ndarray:
     if not pauli_operators:
         return np.array([], dtype=np.float64)
     coeffs = np.array([abs(op[0]) for op in pauli_operators], dtype=np.float64)
@@ -10,4 +10,6 @@ def generate_shifted_theta(pauli_operators: List[Tuple[complex, List[int]]]) ->
         return np.zeros(len(coeffs))
     scaled = ((coeffs*(2 * np.pi)) / norm) % (2 * np.pi)
 
-    return scaled + np.random.normal(0, 0.1, len(scaled))
+    # Без rng используется новый генератор без seed, глобальное состояние np.random не затрагивается
+    rng = rng if rng is not None else np.random.default_rng()
+    return scaled + rng.normal(0, 0.1, len(scaled))
@@ -0,0 +1,24 @@
+import numpy as np
+from typing import Any, Tuple
+
+def lbfgs_optimize(initial_theta: np.ndarray, backend: Any, progress: Any = None, task: Any = None, max_iterations: int = 200,
+    tolerance: float = 1e-9, verbose: bool = True) -> Tuple[np.ndarray, float]:
+    from scipy.optimize import minimize
+
+    if progress is not None:
+        progress.reset(task, total=max_iterations)
+
+    def callback(_):
+        if progress is not None:
+            progress.update(task, advance=1)
+
+    result = minimize(backend.energy_and_gradient, np.asarray(initial_theta, dtype=np.float64), jac=True, method="L-BFGS-B",
+        callback=callback, options={"maxiter": max_iterations, "ftol": tolerance, "gtol": tolerance})
+
+    if progress is not None:
+        progress.update(task, completed=max_iterations)
+    best_theta = result.x % (2 * np.pi)
+    best_energy = float(result.fun)
+    if verbose:
+        print(f"Финальная лучшая энергия (L-BFGS-B): {best_energy:.6f}")
+    return best_theta, best_energy
@@ -0,0 +1,43 @@
+import numpy as np
+from typing import Any
+
+# Предложения ходов отжига: по текущим точкам цепочек theta [C, P] и их шагам step_size [C]
+# возвращаются кандидаты [C, P]; приведение к границам выполняет движок отжига
+
+class GaussianMove:
+    name = "gaussian"
+
+    # Все параметры сдвигаются одновременно на N(0, step_size)
+
+    def propose(self, theta: np.ndarray, step_size: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return theta + rng.normal(size=theta.shape) * step_size[:, None]
+
+class SingleParameterMove:
+    name = "single"
+
+    # Сдвигается один случайный параметр каждой цепочки: малые шаги при большом числе параметров
+
+    def propose(self, theta: np.ndarray, step_size: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        candidates = theta.copy()
+        chains = np.arange(len(theta))
+        parameters = rng.integers(theta.shape[1], size=len(theta))
+        candidates[chains, parameters] += rng.normal(size=len(theta)) * step_size
+        return candidates
+
+class CauchyMove:
+    name = "cauchy"
+
+    # Распределение Коши с тяжелыми хвостами: наряду с локальными шагами изредка дальние прыжки между минимумами
+
+    def propose(self, theta: np.ndarray, step_size: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return theta + rng.standard_cauchy(size=theta.shape) * step_size[:, None]
+
+MOVE_PROPOSALS = {move.name: move for move in (GaussianMove, SingleParameterMove, CauchyMove)}
+
+def create_move(move: Any) -> Any:
+    # Имя из MOVE_PROPOSALS или готовый объект с методом propose(theta, step_size, rng)
+    if not isinstance(move, str):
+        return move
+    if move not in MOVE_PROPOSALS:
+        raise ValueError(f"Неизвестное предложение хода '{move}'. Доступны: {', '.join(MOVE_PROPOSALS)}")
+    return MOVE_PROPOSALS[move]()
@@ -0,0 +1,133 @@
+import queue as queue_module
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from utils.calculate_temp_steps import calculate_temp_steps
+from .generate_shifted_theta import generate_shifted_theta
+from .run_optimizer import run_optimizer
+from .telemetry import TELEMETRY
+from .plan_cache import configure_plan_cache
+
+def _run_restart(restart_id: int, seed_sequence: np.random.SeedSequence, pauli_operators: List[Any], hamiltonian_operators: List[Any],
+    optimizer_params: Dict[str, Any], messages: Any, stop_event: Any, checkpoint_dir: Optional[Path] = None,
+    telemetry: bool = False, plan_cache_dir: Optional[Path] = None) -> Optional[Tuple[int, np.ndarray, float, bool, Optional[Dict[str, Any]]]]:
+    if stop_event.is_set():
+        # Пул передает запуски процессам заранее, и отмена future их уже не останавливает: запуск, начатый
+        # после сигнала остановки, пропускается до построения бэкенда и возвращает None
+        messages.put((restart_id, "skipped", float("inf")))
+        return None
+    if plan_cache_dir is not None:
+        # Процесс запуска не наследует настройку кэша планов при запуске через spawn
+        configure_plan_cache(plan_cache_dir)
+    if telemetry:
+        # Замеры собираются в процессе запуска и возвращаются вместе с результатом
+        TELEMETRY.enable()
+    rng = np.random.default_rng(seed_sequence)
+    # Ходы, принятие и шум энергии запуска идут из одного генератора отжига с этим seed
+    annealing_seed = int(seed_sequence.generate_state(1)[0])
+
+    # stopped - запуск прерван по сигналу остановки, его энергия относится к незавершенному расписанию
+    stopped = [False]
+
+    def callback(theta: np.ndarray, energy: float) -> bool:
+        messages.put((restart_id, "step", energy))
+        stopped[0] = stop_event.is_set()
+        return stopped[0]
+
+    if checkpoint_dir is not None:
+        # Каждый запуск сохраняет и продолжает свою контрольную точку независимо
+        optimizer_params = {**optimizer_params, "checkpoint_path": checkpoint_dir / f"restart_{restart_id}.json"}
+    theta, energy = run_optimizer(initial_theta=generate_shifted_theta(pauli_operators, rng), pauli_operators=pauli_operators,
+        hamiltonian_operators=hamiltonian_operators, progress=None, task=None, seed=annealing_seed, callback=callback, verbose=False,
+        **optimizer_params)
+    messages.put((restart_id, "done", energy))
+    return restart_id, theta, energy, stopped[0], TELEMETRY.to_dict() if telemetry else None
+
+def multi_start_annealing(
+    pauli_operators: List[Any],
+    hamiltonian_operators: List[Any],
+    progress: Any,
+    task: Any,
+    num_restarts: int = 5,
+    max_workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    target_energy: Optional[float] = None,
+    tolerance: float = 0.0,
+    checkpoint_dir: Optional[Union[str, Path]] = None,
+    telemetry: bool = False,
+    plan_cache_dir: Optional[Union[str, Path]] = None,
+    verbose: bool = True,
+    **optimizer_params: Any) -> Tuple[np.ndarray, float, List[float], List[bool]]:
+    # Возвращаются лучшие theta и энергия, а также энергии и флаги досрочной остановки выполненных запусков
+    # в порядке номеров; энергии остановленных запусков не следует включать в распределение по запускам.
+    # Запуски, не начатые до сигнала остановки, пропускаются и в результат не попадают
+
+    if num_restarts < 1:
+        raise ValueError("Количество запусков должно быть положительным")
+    if checkpoint_dir is not None and seed is None:
+        raise ValueError("Для продолжения с контрольных точек запуски должны иметь фиксированный seed")
+    checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir is not None else None
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_restarts)
+    # callback вызывается после каждого температурного уровня, поэтому прогресс запуска считается в уровнях
+    iterations = calculate_temp_steps(optimizer_params.get("initial_temp", 50.0), optimizer_params.get("cooling_rate", 0.98),
+        optimizer_params.get("min_temp", 1e-6))
+    if progress is not None:
+        progress.reset(task, total=num_restarts)
+        worker_tasks = [progress.add_task(f"[cyan]Запуск {i + 1}", total=iterations) for i in range(num_restarts)]
+    best_energies = [float("inf")] * num_restarts
+
+    def handle(message: Tuple[int, str, float]) -> None:
+        restart_id, kind, energy = message
+        best_energies[restart_id] = min(best_energies[restart_id], energy)
+        if progress is not None:
+            description = f"[cyan]Запуск {restart_id + 1}: " + ("пропущен" if kind == "skipped" else f"{best_energies[restart_id]:.6f}")
+            if kind in ("done", "skipped"):
+                progress.update(worker_tasks[restart_id], description=description, completed=iterations)
+                progress.update(task, advance=1)
+            else:
+                progress.update(worker_tasks[restart_id], description=description, advance=1)
+        if target_energy is not None and energy <= target_energy + tolerance:
+            stop_event.set()
+
+    def drain() -> None:
+        while True:
+            try:
+                handle(messages.get_nowait())
+            except queue_module.Empty:
+                return
+
+    results = []
+    with Manager() as manager, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        messages = manager.Queue()
+        stop_event = manager.Event()
+        pending = {executor.submit(_run_restart, i, seed_sequences[i], pauli_operators, hamiltonian_operators, optimizer_params, messages, stop_event,
+            checkpoint_dir, telemetry, plan_cache_dir)
+            for i in range(num_restarts)}
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            drain()
+            results.extend(future.result() for future in done if not future.cancelled())
+            if stop_event.is_set():
+                # Еще не начатые запуски отменяются; уже переданные процессам пропускаются в _run_restart,
+                # запущенные завершаются через callback
+                for future in pending:
+                    future.cancel()
+        drain()
+
+    # Пропущенные запуски (None) не входят ни в результаты, ни в распределение энергий
+    results = [result for result in results if result is not None]
+    skipped = num_restarts - len(results)
+    if not results:
+        raise RuntimeError("Ни один запуск отжига не завершился")
+    for *_, report in results:
+        if report is not None:
+            TELEMETRY.merge(report)
+    _, best_theta, best_energy, _, _ = min(results, key=lambda result: result[2])
+    results.sort(key=lambda result: result[0])
+    energies = [energy for _, _, energy, _, _ in results]
+    stopped = [flag for _, _, _, flag, _ in results]
+    if verbose:
+        print(f"Финальная лучшая энергия ({len(results)} запусков, остановлено досрочно: {sum(stopped)}, пропущено: {skipped}): {best_energy:.6f}")
+    return best_theta, best_energy, energies, stopped
@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Any, List, Tuple
+from .generate_neighbor_theta import generate_neighbor_theta
+from .pauli_sum import PauliSum
+from .preprocess_hamiltonian import qubit_wise_commuting_groups, group_diagonal
+from .statevector_backend import StatevectorBackend, DIAGONAL_CACHE_BYTES
+
+# Модели шума при вычислении энергии в отжиге. Все случайные числа берутся из переданного
+# numpy.random.Generator, поэтому при фиксированном seed результат воспроизводим.
+# cost - что стоит одно вычисление энергии в данной модели.
+
+# Стандартное отклонение шума параметров по умолчанию
+DEFAULT_NOISE_SCALE = 0.05
+
+# Число измерений на одно вычисление энергии по умолчанию
+DEFAULT_SHOTS = 1000
+
+class NoiselessModel:
+    name = "noiseless"
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum):
+        self.cost = "точная энергия: одно вычисление бэкенда на точку"
+
+    def energies(self, thetas: np.ndarray, backend: Any, rng: np.random.Generator) -> np.ndarray:
+        return backend.batch_energy(thetas)
+
+class ParameterNoise:
+    name = "parameter"
+
+    # Энергия вычисляется точно, но в точке theta + N(0, scale): моделирует неточность управляющих углов
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum, scale: float = DEFAULT_NOISE_SCALE):
+        self.scale = scale
+        self.cost = f"одно вычисление бэкенда на точку и {len(pauli_operators)} нормальных чисел (σ = {scale})"
+
+    def energies(self, thetas: np.ndarray, backend: Any, rng: np.random.Generator) -> np.ndarray:
+        return backend.batch_energy(generate_neighbor_theta(np.asarray(thetas), self.scale, rng))
+
+class ShotNoise:
+    name = "shot"
+
+    # Эмуляция измерений: слагаемые разбиваются на кубитно-коммутирующие группы, состояние поворачивается
+    # в базис группы (X -> H, Y -> H·S†), и из |ψ'|^2 выбирается shots_g исходов. Оценка группы -
+    # среднее по исходам диагонали d_g[b] = Σ_h c_h (-1)^{s_h·b}, s_h - носитель слагаемого.
+    # Измерения распределяются по группам пропорционально Σ|c_h|; при shots -> ∞ оценка переходит в точную энергию.
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum, shots: int = DEFAULT_SHOTS):
+        if shots < 1:
+            raise ValueError("Число измерений должно быть положительным")
+        self.shots = shots
+        self.state_backend = StatevectorBackend(pauli_operators, hamiltonian)
+        self.num_qubits = hamiltonian.num_qubits
+        labels, basis_x, basis_z = qubit_wise_commuting_groups(hamiltonian)
+        self.basis_x, self.basis_z = basis_x[:, 0], basis_z[:, 0]
+        support = (hamiltonian.x | hamiltonian.z)[:, 0]
+        coeffs = hamiltonian.coeffs.real
+        self.group_terms = [(support[labels == g], coeffs[labels == g]) for g in range(len(basis_x))]
+
+        weights = np.array([np.abs(c[s != 0]).sum() for s, c in self.group_terms])
+        self.group_shots = np.zeros(len(weights), dtype=np.int64)
+        if weights.sum() > 0:
+            measured = weights > 0
+            self.group_shots[measured] = np.maximum(1, np.round(shots * weights[measured] / weights.sum())).astype(np.int64)
+        self.diagonals = None
+        if len(weights) * len(self.state_backend.basis) * 8 <= DIAGONAL_CACHE_BYTES:
+            self.diagonals = [self._measured_diagonal(g) for g in range(len(weights))]
+        self.cost = (f"вектор состояния из 2^{self.num_qubits} амплитуд и {len(weights)} поворотов базиса измерения на точку, "
+            f"{int(self.group_shots.sum())} выборок; погрешность ~ 1/√shots")
+
+    def _measured_diagonal(self, group: int) -> np.ndarray:
+        # После поворота в базис группы ее слагаемые - Z-строки на своих носителях: группа без X-маски
+        support, coeffs = self.group_terms[group]
+        return group_diagonal(0, support, coeffs, self.state_backend.basis).real
+
+    def _rotate_to_basis(self, states: np.ndarray, group: int) -> np.ndarray:
+        states = states.copy()
+        basis = self.state_backend.basis
+        for qubit in range(self.num_qubits):
+            bit = np.uint64(1) << np.uint64(qubit)
+            if not self.basis_x[group] & bit:
+                continue
+            low = (basis[(basis & bit) == 0]).astype(np.intp)
+            high = low | int(bit)
+            zero, one = states[..., low], states[..., high]
+            if self.basis_z[group] & bit:
+                one = -1j * one
+            states[..., low], states[..., high] = (zero + one) / np.sqrt(2), (zero - one) / np.sqrt(2)
+        return states
+
+    def energies(self, thetas: np.ndarray, backend: Any, rng: np.random.Generator) -> np.ndarray:
+        thetas = np.atleast_2d(thetas)
+        states = np.zeros((len(thetas), len(self.state_backend.basis)), dtype=np.complex128)
+        states[:, 0] = 1.0
+        for k in reversed(range(len(self.state_backend.coeffs))):
+            self.state_backend.apply_rotation(states, k, thetas[:, k] * self.state_backend.coeffs[k])
+        energies = np.zeros(len(thetas))
+        for group, shots in enumerate(self.group_shots):
+            diagonal = self.diagonals[group] if self.diagonals is not None else self._measured_diagonal(group)
+            if shots == 0:
+                energies += diagonal[0]
+                continue
+            probabilities = np.abs(self._rotate_to_basis(states, group)) ** 2
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            counts = rng.multinomial(shots, probabilities)
+            energies += counts @ diagonal / shots
+        return energies
+
+NOISE_MODELS = {model.name: model for model in (NoiselessModel, ParameterNoise, ShotNoise)}
+
+def create_noise_model(noise: Any, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum,
+    noise_scale: float = DEFAULT_NOISE_SCALE, shots: int = DEFAULT_SHOTS) -> Any:
+    # Имя из NOISE_MODELS или готовый объект с методом energies(thetas, backend, rng)
+    if not isinstance(noise, str):
+        return noise
+    if noise not in NOISE_MODELS:
+        raise ValueError(f"Неизвестная модель шума '{noise}'. Доступны: {', '.join(NOISE_MODELS)}")
+    if noise == "parameter":
+        return ParameterNoise(pauli_operators, hamiltonian, noise_scale)
+    if noise == "shot":
+        return ShotNoise(pauli_operators, hamiltonian, shots)
+    return NoiselessModel(pauli_operators, hamiltonian)
@@ -0,0 +1,43 @@
+import numpy as np
+from typing import List, Tuple
+from .ansatz_plan import AnsatzPlan
+from .plan_cache import get_ansatz_plan
+from .pauli_sum import PauliSum
+
+# Сдвиг угла для правила сдвига параметра: dE/dα = E(α + π/4) - E(α - π/4)
+PARAMETER_SHIFT = np.pi / 4
+
+class PauliBackend:
+    name = "pauli"
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum):
+        self.pauli_operators = pauli_operators
+        self.hamiltonian = hamiltonian
+        self.operators = PauliSum.from_terms(pauli_operators)
+        self.coeffs = np.array([c for c, _ in pauli_operators])
+        self._plan = None
+
+    @property
+    def plan(self) -> AnsatzPlan:
+        if self._plan is None:
+            self._plan = get_ansatz_plan(self.operators, self.hamiltonian)
+        return self._plan
+
+    def batch_energy(self, thetas: np.ndarray) -> np.ndarray:
+        thetas = np.atleast_2d(thetas)
+        if thetas.shape[1] != len(self.coeffs):
+            raise ValueError("Размеры theta и pauli_operators должны совпадать")
+        return self.plan.energies(thetas * self.coeffs[None, :], self.hamiltonian.coeffs)
+
+    def energy(self, theta: np.ndarray) -> float:
+        return float(self.batch_energy(theta)[0])
+
+    def energy_and_gradient(self, theta: np.ndarray) -> Tuple[float, np.ndarray]:
+        # Исходная точка и все 2P сдвинутых по углам α_k = θ_k·c_k вычисляются одним пакетным вызовом плана
+        angles = np.asarray(theta, dtype=np.float64) * self.coeffs
+        num_parameters = len(angles)
+        shifts = np.eye(num_parameters) * PARAMETER_SHIFT
+        batch = angles[None, :] + np.concatenate([np.zeros((1, num_parameters)), shifts, -shifts])
+        energies = self.plan.energies(batch, self.hamiltonian.coeffs)
+        gradient = np.real(self.coeffs) * (energies[1:num_parameters + 1] - energies[num_parameters + 1:])
+        return float(energies[0]), gradient
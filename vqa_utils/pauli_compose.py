@@ -1,13 +1,13 @@
-from functools import lru_cache
-from typing import Tuple
-from .multiply_pauli import multiply_pauli
+from typing import Tuple, Union
+from constants.pauli import PHASE_POWERS
+from .pauli_string import PauliString, indices_to_masks, masks_to_indices, compose_masks
 
-def pauli_compose(s1: tuple, s2: tuple) -> Tuple[complex, tuple]:
-    coefficient = 1.0 + 0j
-    result = []
-    for a, b in zip(s1, s2):
-        coeff, idx = multiply_pauli(a, b)
-        coefficient *= coeff
-        result.append(idx)
-        
-    return coefficient, tuple(result)
+def pauli_compose(s1: Union[tuple, PauliString], s2: Union[tuple, PauliString]) -> Tuple[complex, Union[tuple, PauliString]]:
+    if isinstance(s1, PauliString) and isinstance(s2, PauliString):
+        return s1.compose(s2)
+
+    x1, z1 = indices_to_masks(s1)
+    x2, z2 = indices_to_masks(s2)
+    power, x_mask, z_mask = compose_masks(x1, z1, x2, z2)
+
+    return PHASE_POWERS[power], masks_to_indices(x_mask, z_mask, min(len(s1), len(s2)))
@@ -0,0 +1,65 @@
+from typing import Iterable, Tuple
+from constants.pauli import PAULI_TO_XZ, XZ_TO_PAULI, PHASE_POWERS
+
+def indices_to_masks(indices: Iterable[int]) -> Tuple[int, int]:
+    x_mask = 0
+    z_mask = 0
+    for qubit, index in enumerate(indices):
+        x_bit, z_bit = PAULI_TO_XZ[index]
+        x_mask |= x_bit << qubit
+        z_mask |= z_bit << qubit
+
+    return x_mask, z_mask
+
+def masks_to_indices(x_mask: int, z_mask: int, num_qubits: int) -> Tuple[int, ...]:
+    return tuple(XZ_TO_PAULI[((x_mask >> qubit) & 1) | (((z_mask >> qubit) & 1) << 1)] for qubit in range(num_qubits))
+
+def compose_masks(x1: int, z1: int, x2: int, z2: int) -> Tuple[int, int, int]:
+    # P(x, z) = i^{x·z} X^x Z^z, поэтому фаза произведения считается через popcount:
+    # i^{x1·z1 + x2·z2 - x3·z3} * (-1)^{z1·x2}
+    x3 = x1 ^ x2
+    z3 = z1 ^ z2
+    power = ((x1 & z1).bit_count() + (x2 & z2).bit_count() + 2 * (z1 & x2).bit_count() - (x3 & z3).bit_count()) & 3
+
+    return power, x3, z3
+
+class PauliString:
+    __slots__ = ("x", "z", "num_qubits")
+
+    def __init__(self, x: int, z: int, num_qubits: int):
+        self.x = x
+        self.z = z
+        self.num_qubits = num_qubits
+
+    @classmethod
+    def from_indices(cls, indices: Iterable[int]) -> "PauliString":
+        indices = tuple(indices)
+        x_mask, z_mask = indices_to_masks(indices)
+        return cls(x_mask, z_mask, len(indices))
+
+    def to_indices(self) -> Tuple[int, ...]:
+        return masks_to_indices(self.x, self.z, self.num_qubits)
+
+    def compose(self, other: "PauliString") -> Tuple[complex, "PauliString"]:
+        power, x_mask, z_mask = compose_masks(self.x, self.z, other.x, other.z)
+        return PHASE_POWERS[power], PauliString(x_mask, z_mask, max(self.num_qubits, other.num_qubits))
+
+    def commutes_with(self, other: "PauliString") -> bool:
+        return ((self.x & other.z).bit_count() + (self.z & other.x).bit_count()) % 2 == 0
+
+    def is_diagonal(self) -> bool:
+        return self.x == 0
+
+    def __mul__(self, other: "PauliString") -> Tuple[complex, "PauliString"]:
+        return self.compose(other)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PauliString):
+            return NotImplemented
+        return self.x == other.x and self.z == other.z
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.z))
+
+    def __repr__(self) -> str:
+        return f"PauliString({''.join(map(str, self.to_indices()))})"
@@ -0,0 +1,170 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from constants.pauli import PAULI_TO_XZ, XZ_TO_PAULI
+from .popcount import popcount
+
+# Ограничение на число строк в одном блоке попарного умножения (память под маски)
+MULTIPLY_BLOCK_SIZE = 1 << 20
+
+PHASES = np.array([1.0, 1j, -1.0, -1j], dtype=np.complex128)
+
+def num_words(num_qubits: int) -> int:
+    return max(1, (num_qubits + 63) // 64)
+
+def compose_mask_arrays(x1: np.ndarray, z1: np.ndarray, x2: np.ndarray, z2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    x3 = x1 ^ x2
+    z3 = z1 ^ z2
+    power = (popcount(x1 & z1) + popcount(x2 & z2) + 2 * popcount(z1 & x2) - popcount(x3 & z3)).sum(axis=-1)
+    return power & 3, x3, z3
+
+def mask_keys(x: np.ndarray, z: np.ndarray, num_qubits: int) -> np.ndarray:
+    # Одномерные ключи строк для сортировки и поиска: uint64 до 32 кубитов, иначе байтовые void-ключи
+    if num_qubits <= 32:
+        return (x[:, 0] << np.uint64(32)) | z[:, 0]
+    masks = np.ascontiguousarray(np.hstack([x, z]))
+    return masks.view(np.dtype((np.void, masks.shape[1] * 8))).ravel()
+
+def labeled_mask_keys(labels: np.ndarray, x: np.ndarray, z: Optional[np.ndarray], num_qubits: int) -> np.ndarray:
+    # Ключи строк с меткой (номером точки пакета): одинаковые строки разных точек не сливаются.
+    # z = None - ключи базисных состояний |x>. Пока метка и маски умещаются в 64 бита, ключ - uint64,
+    # иначе байтовый void-ключ
+    labels = np.asarray(labels, dtype=np.uint64)
+    masks = [x] if z is None else [x, z]
+    if len(masks) * num_qubits + int(labels.max(initial=0)).bit_length() <= 64:
+        keys = labels.copy()
+        for mask in masks:
+            keys = (keys << np.uint64(num_qubits)) | mask[:, 0]
+        return keys
+    masks = np.ascontiguousarray(np.hstack([labels[:, None], *masks]))
+    return masks.view(np.dtype((np.void, masks.shape[1] * 8))).ravel()
+
+class PauliSum:
+    __slots__ = ("x", "z", "coeffs", "num_qubits")
+
+    def __init__(self, x: np.ndarray, z: np.ndarray, coeffs: np.ndarray, num_qubits: int):
+        self.x = np.ascontiguousarray(x, dtype=np.uint64).reshape(-1, num_words(num_qubits))
+        self.z = np.ascontiguousarray(z, dtype=np.uint64).reshape(-1, num_words(num_qubits))
+        self.coeffs = np.ascontiguousarray(coeffs, dtype=np.complex128).reshape(-1)
+        self.num_qubits = num_qubits
+        if not (len(self.x) == len(self.z) == len(self.coeffs)):
+            raise ValueError("Размеры масок и коэффициентов PauliSum должны совпадать")
+
+    @classmethod
+    def identity(cls, num_qubits: int, coeff: complex = 1.0) -> "PauliSum":
+        words = num_words(num_qubits)
+        return cls(np.zeros((1, words)), np.zeros((1, words)), [coeff], num_qubits)
+
+    @classmethod
+    def from_indices_array(cls, indices: np.ndarray, coeffs: np.ndarray) -> "PauliSum":
+        indices = np.asarray(indices, dtype=np.int64).reshape(len(coeffs), -1)
+        num_qubits = indices.shape[1]
+        table = np.array(PAULI_TO_XZ, dtype=np.uint64)
+        x_bits = table[indices, 0]
+        z_bits = table[indices, 1]
+        words = num_words(num_qubits)
+        x = np.zeros((len(indices), words), dtype=np.uint64)
+        z = np.zeros((len(indices), words), dtype=np.uint64)
+        for qubit in range(num_qubits):
+            word, shift = divmod(qubit, 64)
+            x[:, word] |= x_bits[:, qubit] << np.uint64(shift)
+            z[:, word] |= z_bits[:, qubit] << np.uint64(shift)
+        return cls(x, z, coeffs, num_qubits)
+
+    @classmethod
+    def from_terms(cls, terms: List[Tuple[complex, List[int]]]) -> "PauliSum":
+        if not terms:
+            raise ValueError("Список операторов Паули пуст")
+        coeffs = np.array([c for c, _ in terms], dtype=np.complex128)
+        return cls.from_indices_array(np.array([list(op) for _, op in terms]), coeffs)
+
+    @classmethod
+    def from_dict(cls, terms: Dict[Tuple[int, ...], complex]) -> "PauliSum":
+        return cls.from_terms([(c, op) for op, c in terms.items()])
+
+    def to_indices_array(self) -> np.ndarray:
+        indices = np.empty((len(self), self.num_qubits), dtype=np.int64)
+        table = np.array(XZ_TO_PAULI, dtype=np.int64)
+        for qubit in range(self.num_qubits):
+            word, shift = divmod(qubit, 64)
+            x_bit = (self.x[:, word] >> np.uint64(shift)) & np.uint64(1)
+            z_bit = (self.z[:, word] >> np.uint64(shift)) & np.uint64(1)
+            indices[:, qubit] = table[(x_bit | (z_bit << np.uint64(1))).astype(np.int64)]
+        return indices
+
+    def to_terms(self) -> List[Tuple[complex, List[int]]]:
+        return [(c, op.tolist()) for c, op in zip(self.coeffs, self.to_indices_array())]
+
+    def to_dict(self) -> Dict[Tuple[int, ...], complex]:
+        return {tuple(op): c for op, c in zip(self.to_indices_array().tolist(), self.coeffs)}
+
+    def __len__(self) -> int:
+        return len(self.coeffs)
+
+    def copy(self) -> "PauliSum":
+        return PauliSum(self.x.copy(), self.z.copy(), self.coeffs.copy(), self.num_qubits)
+
+    def adjoint(self) -> "PauliSum":
+        # Строки Паули эрмитовы, поэтому сопрягаются только коэффициенты
+        return PauliSum(self.x, self.z, self.coeffs.conj(), self.num_qubits)
+
+    def scale(self, factor: complex) -> "PauliSum":
+        return PauliSum(self.x, self.z, self.coeffs * factor, self.num_qubits)
+
+    def add(self, other: "PauliSum") -> "PauliSum":
+        if self.num_qubits != other.num_qubits:
+            raise ValueError("Число кубитов в суммах Паули должно совпадать")
+        return PauliSum(np.concatenate([self.x, other.x]), np.concatenate([self.z, other.z]),
+            np.concatenate([self.coeffs, other.coeffs]), self.num_qubits).simplify()
+
+    def row_keys(self) -> np.ndarray:
+        return mask_keys(self.x, self.z, self.num_qubits)
+
+    def simplify(self) -> "PauliSum":
+        # Сортировка по маскам и свертка одинаковых строк
+        if len(self) == 0:
+            return self
+        _, first, inverse = np.unique(self.row_keys(), return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        coeffs = np.bincount(inverse, weights=self.coeffs.real, minlength=len(first)) + 1j * np.bincount(inverse, weights=self.coeffs.imag, minlength=len(first))
+        return PauliSum(self.x[first], self.z[first], coeffs, self.num_qubits)
+
+    def prune(self, threshold: float = 0.0) -> "PauliSum":
+        keep = np.abs(self.coeffs) > threshold
+        return PauliSum(self.x[keep], self.z[keep], self.coeffs[keep], self.num_qubits)
+
+    def multiply(self, other: "PauliSum") -> "PauliSum":
+        if self.num_qubits != other.num_qubits:
+            raise ValueError("Число кубитов в суммах Паули должно совпадать")
+        block_rows = max(1, MULTIPLY_BLOCK_SIZE // max(1, len(other)))
+        blocks = []
+        for start in range(0, len(self), block_rows):
+            left = slice(start, start + block_rows)
+            power, x, z = compose_mask_arrays(self.x[left, None, :], self.z[left, None, :], other.x[None, :, :], other.z[None, :, :])
+            coeffs = self.coeffs[left, None] * other.coeffs[None, :] * PHASES[power]
+            words = self.x.shape[1]
+            blocks.append(PauliSum(x.reshape(-1, words), z.reshape(-1, words), coeffs.reshape(-1), self.num_qubits).simplify())
+        if len(blocks) == 1:
+            return blocks[0]
+        return PauliSum(np.concatenate([b.x for b in blocks]), np.concatenate([b.z for b in blocks]),
+            np.concatenate([b.coeffs for b in blocks]), self.num_qubits).simplify()
+
+    def conjugate_rotation(self, x: np.ndarray, z: np.ndarray, angle: float) -> "PauliSum":
+        # exp(-iαP) Q exp(iαP): коммутирующие с P слагаемые не меняются,
+        # антикоммутирующие переходят в cos(2α)·Q - i·sin(2α)·P·Q
+        x = np.asarray(x, dtype=np.uint64).reshape(1, -1)
+        z = np.asarray(z, dtype=np.uint64).reshape(1, -1)
+        anticommute = ((popcount(self.x & z) + popcount(self.z & x)).sum(axis=-1) & 1).astype(bool)
+        if not anticommute.any():
+            return self
+        power, rotated_x, rotated_z = compose_mask_arrays(x, z, self.x[anticommute], self.z[anticommute])
+        coeffs = self.coeffs.copy()
+        coeffs[anticommute] *= np.cos(2 * angle)
+        rotated_coeffs = -1j * np.sin(2 * angle) * self.coeffs[anticommute] * PHASES[power]
+        return PauliSum(np.concatenate([self.x, rotated_x]), np.concatenate([self.z, rotated_z]),
+            np.concatenate([coeffs, rotated_coeffs]), self.num_qubits).simplify()
+
+    def __mul__(self, other: "PauliSum") -> "PauliSum":
+        return self.multiply(other)
+
+    def __repr__(self) -> str:
+        return f"PauliSum(terms={len(self)}, num_qubits={self.num_qubits})"
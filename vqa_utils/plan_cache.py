@@ -0,0 +1,108 @@
+import hashlib
+import os
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+from constants.file_paths import PLAN_CACHE_DIR
+from utils.evict_cache_files import evict_cache_files
+from .ansatz_plan import AnsatzPlan
+from .pauli_sum import PauliSum
+from .telemetry import TELEMETRY
+
+# Версия формата плана: при изменении AnsatzPlan старые файлы кэша перестают совпадать по ключу
+PLAN_FORMAT_VERSION = 1
+
+PLAN_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Предел размера папки кэша планов на диске (кэш на диске включается configure_plan_cache)
+PLAN_DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+def plan_fingerprint(operators: PauliSum, hamiltonian: PauliSum) -> str:
+    # План зависит только от строк Паули (и их порядка), но не от theta и коэффициентов
+    digest = hashlib.sha256()
+    digest.update(f"v{PLAN_FORMAT_VERSION}:{operators.num_qubits}:{len(operators)}:{len(hamiltonian)}".encode())
+    for masks in (operators.x, operators.z, hamiltonian.x, hamiltonian.z):
+        digest.update(np.ascontiguousarray(masks).tobytes())
+    return digest.hexdigest()
+
+class PlanCache:
+    def __init__(self, max_bytes: int = PLAN_CACHE_MAX_BYTES, directory: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = PLAN_DISK_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.plans: "OrderedDict[str, AnsatzPlan]" = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+
+    def _remember(self, key: str, plan: AnsatzPlan) -> None:
+        size = plan.nbytes
+        if size > self.max_bytes:
+            return
+        self.plans[key] = plan
+        self.sizes[key] = size
+        self.total_bytes += size
+        # Вытеснение давно не использованных планов по суммарному размеру
+        while self.total_bytes > self.max_bytes:
+            evicted, _ = self.plans.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(evicted)
+
+    def _load(self, key: str) -> Optional[AnsatzPlan]:
+        if self.directory is None:
+            return None
+        path = self.directory / f"{key}.npz"
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as arrays:
+                plan = AnsatzPlan.from_arrays(dict(arrays))
+            # Время изменения отмечает последнее использование: по нему папка вытесняется
+            os.utime(path)
+            return plan
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _store(self, key: str, plan: AnsatzPlan) -> None:
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.directory / f"{key}.{os.getpid()}.tmp.npz"
+            np.savez(temporary, **plan.to_arrays())
+            os.replace(temporary, self.directory / f"{key}.npz")
+            evict_cache_files(self.directory, self.max_disk_bytes)
+        except OSError:
+            pass
+
+    def get(self, operators: PauliSum, hamiltonian: PauliSum) -> AnsatzPlan:
+        key = plan_fingerprint(operators, hamiltonian)
+        if key in self.plans:
+            self.plans.move_to_end(key)
+            return self.plans[key]
+        plan = self._load(key)
+        if plan is None:
+            plan = AnsatzPlan.compile(operators, hamiltonian)
+            self._store(key, plan)
+        self._remember(key, plan)
+        return plan
+
+    def clear(self) -> None:
+        self.plans.clear()
+        self.sizes.clear()
+        self.total_bytes = 0
+
+# По умолчанию планы хранятся только в памяти процесса
+PLAN_CACHE = PlanCache(PLAN_CACHE_MAX_BYTES)
+
+def configure_plan_cache(directory: Optional[Union[str, Path]] = PLAN_CACHE_DIR, max_disk_bytes: int = PLAN_DISK_CACHE_MAX_BYTES) -> None:
+    # Включение (directory) или отключение (None) кэша планов на диске; вызывается в каждом процессе, который компилирует планы
+    PLAN_CACHE.directory = Path(directory) if directory is not None else None
+    PLAN_CACHE.max_disk_bytes = max_disk_bytes
+
+def get_ansatz_plan(operators: PauliSum, hamiltonian: PauliSum) -> AnsatzPlan:
+    plan = PLAN_CACHE.get(operators, hamiltonian)
+    # |U| - слагаемые разложения анзаца, |UHU| - ненулевые элементы H на носителе U|0...0>
+    TELEMETRY.size("ansatz_terms", plan.num_terms)
+    TELEMETRY.size("uhu_terms", len(plan.hamiltonian[0]))
+    return plan
@@ -0,0 +1,62 @@
+import numpy as np
+from typing import List, Sequence, Tuple
+from .pauli_sum import PauliSum, PHASES
+from .popcount import popcount
+
+def compress_hamiltonian(hamiltonian: PauliSum, threshold: float = 0.0) -> PauliSum:
+    # Слияние одинаковых строк и отсев слагаемых с |c| <= threshold (при 0 - только точных нулей)
+    return hamiltonian.simplify().prune(threshold)
+
+def group_by_x_mask(hamiltonian: PauliSum) -> Tuple[np.ndarray, np.ndarray]:
+    # Слагаемые с общей X-маской x переводят |b> в |b ^ x>, поэтому группа действует одной перестановкой
+    # базиса и диагональю Σ_h c_h i^{x·z_h} (-1)^{z_h·b}; возвращаются маски групп [G, W] и номер группы слагаемого
+    group_x, group_index = np.unique(hamiltonian.x, axis=0, return_inverse=True)
+    return group_x, group_index.reshape(-1)
+
+def x_mask_groups(hamiltonian: PauliSum) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # Слагаемые, разложенные по группам X-масок: (маска группы [W], Z-маски слагаемых [T, W], коэффициенты [T])
+    group_x, group_index = group_by_x_mask(hamiltonian)
+    order = np.argsort(group_index, kind="stable")
+    bounds = np.searchsorted(group_index[order], np.arange(1, len(group_x)))
+    return [(group_x[g], hamiltonian.z[terms], hamiltonian.coeffs[terms]) for g, terms in enumerate(np.split(order, bounds))]
+
+def group_diagonal(x_mask: int, z_masks: np.ndarray, coeffs: np.ndarray, basis: np.ndarray) -> np.ndarray:
+    # (H_x ψ)[c] = D_x[c] ψ[c ^ x], D_x[c] = Σ_h c_h i^{x·z_h} (-1)^{z_h·(c ^ x)}; маски - одно слово (до 64 кубитов)
+    x_mask = np.uint64(x_mask)
+    source = basis ^ x_mask
+    diagonal = np.zeros(len(basis), dtype=np.complex128)
+    for z_mask, coeff in zip(z_masks, coeffs):
+        diagonal += coeff * PHASES[popcount(x_mask & z_mask) & 3] * (1 - 2 * (popcount(source & z_mask) & 1))
+    return diagonal
+
+def apply_grouped_hamiltonian(state: np.ndarray, groups: Sequence[Tuple[int, np.ndarray, np.ndarray]], basis: np.ndarray,
+    diagonals: Sequence[np.ndarray] = ()) -> np.ndarray:
+    # Hψ по группам X-масок: одна перестановка базиса и одна диагональ на группу. diagonals - заранее вычисленные
+    # диагонали первых групп, остальные пересчитываются. state может быть пакетом [B, 2^n]
+    result = np.zeros(state.shape, dtype=np.complex128)
+    for g, (x_mask, z_masks, coeffs) in enumerate(groups):
+        diagonal = diagonals[g] if g < len(diagonals) else group_diagonal(x_mask, z_masks, coeffs, basis)
+        result += diagonal * (state[..., (basis ^ np.uint64(x_mask)).astype(np.intp)] if x_mask else state)
+    return result
+
+def qubit_wise_commuting_groups(hamiltonian: PauliSum) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Жадное разбиение на группы, попарно коммутирующие на каждом кубите (начиная с крупных коэффициентов).
+    # Группа диагонализуется одним набором однокубитных поворотов в базис (basis_x, basis_z):
+    # X -> H, Y -> H·S†, после чего каждое слагаемое группы становится Z-строкой на своем носителе
+    order = np.argsort(-np.abs(hamiltonian.coeffs), kind="stable")
+    basis_x = np.zeros_like(hamiltonian.x)
+    basis_z = np.zeros_like(hamiltonian.z)
+    labels = np.empty(len(hamiltonian), dtype=np.int64)
+    num_groups = 0
+    for term in order:
+        x, z = hamiltonian.x[term], hamiltonian.z[term]
+        overlap = (basis_x[:num_groups] | basis_z[:num_groups]) & (x | z)
+        conflict = (((basis_x[:num_groups] ^ x) | (basis_z[:num_groups] ^ z)) & overlap).any(axis=1)
+        free = np.flatnonzero(~conflict)
+        group = free[0] if len(free) else num_groups
+        if group == num_groups:
+            num_groups += 1
+        basis_x[group] |= x
+        basis_z[group] |= z
+        labels[term] = group
+    return labels, basis_x[:num_groups], basis_z[:num_groups]
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
+from constants.file_paths import REFERENCE_CACHE_DIR
+from .pauli_sum import PauliSum
+from .preprocess_hamiltonian import compress_hamiltonian, group_by_x_mask, x_mask_groups, group_diagonal, apply_grouped_hamiltonian
+from .taper_qubits import taper_problem
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+# Химическая точность, Хартри
+CHEMICAL_ACCURACY = 1.6e-3
+
+# До этого числа кубитов спектр считается плотной диагонализацией, дальше - методом Ланцоша (eigsh)
+DENSE_MAX_QUBITS = 10
+
+# Наибольшее число кубитов, для которого строится точное решение
+MAX_REFERENCE_QUBITS = 22
+
+# Предел памяти под разреженную матрицу; при превышении H применяется без хранения матрицы
+SPARSE_MATRIX_MAX_BYTES = 1 << 30
+
+# Версия формата кэша точных энергий
+REFERENCE_CACHE_VERSION = 1
+
+def _prepare(hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum]) -> Tuple[PauliSum, np.ndarray, List[Tuple[int, np.ndarray, np.ndarray]]]:
+    # Вывод read_hamiltonian_data или PauliSum -> слагаемые, сгруппированные по X-маске
+    hamiltonian = compress_hamiltonian(hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian))
+    if hamiltonian.num_qubits > MAX_REFERENCE_QUBITS:
+        raise ValueError(f"Точное решение строится не более чем для {MAX_REFERENCE_QUBITS} кубитов")
+    basis = np.arange(1 << hamiltonian.num_qubits, dtype=np.uint64)
+    groups = [(x[0], z[:, 0], coeffs) for x, z, coeffs in x_mask_groups(hamiltonian)]
+    return hamiltonian, basis, groups
+
+def hamiltonian_sparse_matrix(hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum]) -> "sparse.csr_matrix":
+    # Каждая группа X-масок дает ровно один ненулевой элемент в строке, поэтому матрица собирается
+    # из G·2^n элементов без плотных промежуточных массивов 2^n × 2^n
+    from scipy import sparse
+    hamiltonian, basis, groups = _prepare(hamiltonian)
+    rows = np.tile(basis.astype(np.int64), len(groups))
+    cols = np.concatenate([(basis ^ x_mask).astype(np.int64) for x_mask, _, _ in groups])
+    data = np.concatenate([group_diagonal(x_mask, z_masks, coeffs, basis) for x_mask, z_masks, coeffs in groups])
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(basis), len(basis)))
+
+def hamiltonian_linear_operator(hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum]) -> "sparse.linalg.LinearOperator":
+    # Применение H без индексов матрицы: диагонали групп хранятся, пока укладываются в SPARSE_MATRIX_MAX_BYTES
+    # (16 байт на элемент против 40 у CSR), остальные пересчитываются при каждом умножении
+    from scipy.sparse.linalg import LinearOperator
+    hamiltonian, basis, groups = _prepare(hamiltonian)
+    num_cached = min(len(groups), SPARSE_MATRIX_MAX_BYTES // (16 * len(basis)))
+    diagonals = [group_diagonal(x_mask, z_masks, coeffs, basis) for x_mask, z_masks, coeffs in groups[:num_cached]]
+
+    def matvec(vector: np.ndarray) -> np.ndarray:
+        return apply_grouped_hamiltonian(np.asarray(vector).reshape(-1), groups, basis, diagonals)
+
+    return LinearOperator((len(basis), len(basis)), matvec=matvec, dtype=np.complex128)
+
+def ground_state_energy(hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum]) -> Tuple[float, str]:
+    # Наименьшее собственное значение и способ, которым оно найдено
+    from scipy.sparse.linalg import eigsh
+    hamiltonian = compress_hamiltonian(hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian))
+    num_qubits = hamiltonian.num_qubits
+    if num_qubits <= DENSE_MAX_QUBITS:
+        return float(np.linalg.eigvalsh(hamiltonian_sparse_matrix(hamiltonian).toarray())[0]), "dense"
+    num_groups = len(group_by_x_mask(hamiltonian)[0])
+    # Элемент CSR - 16 байт значения и 4 байта индекса, плюс временные массивы COO при сборке
+    if num_groups * (1 << num_qubits) * 40 <= SPARSE_MATRIX_MAX_BYTES:
+        operator, method = hamiltonian_sparse_matrix(hamiltonian), "eigsh"
+    else:
+        operator, method = hamiltonian_linear_operator(hamiltonian), "eigsh_matrix_free"
+    # Начальный вектор фиксирован, чтобы результат не зависел от глобального генератора
+    start = np.random.default_rng(0).normal(size=1 << num_qubits).astype(np.complex128)
+    return float(eigsh(operator, k=1, which="SA", v0=start, return_eigenvectors=False)[0]), method
+
+def hamiltonian_hash(hamiltonian: PauliSum) -> str:
+    # Хэш не зависит от порядка слагаемых и формата файла: строки упорядочиваются после слияния
+    hamiltonian = compress_hamiltonian(hamiltonian)
+    order = np.lexsort(np.concatenate([hamiltonian.x, hamiltonian.z], axis=1).T[::-1])
+    digest = hashlib.sha256(f"v{REFERENCE_CACHE_VERSION}:{hamiltonian.num_qubits}".encode())
+    for array in (hamiltonian.x[order], hamiltonian.z[order], hamiltonian.coeffs[order]):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def reference_energy(hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum],
+    cache_dir: Optional[Union[str, Path]] = REFERENCE_CACHE_DIR) -> float:
+    # Точная энергия основного состояния с кэшем по хэшу гамильтониана: повторные запуски на том же файле ее не пересчитывают
+    hamiltonian = compress_hamiltonian(hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian))
+    path = Path(cache_dir) / f"{hamiltonian_hash(hamiltonian)}.json" if cache_dir is not None else None
+    if path is not None and path.exists():
+        try:
+            return float(json.loads(path.read_text(encoding="utf-8"))["energy"])
+        except (OSError, KeyError, ValueError):
+            pass
+    energy, method = ground_state_energy(hamiltonian)
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+            temporary.write_text(json.dumps({"version": REFERENCE_CACHE_VERSION, "energy": energy, "method": method,
+                "num_qubits": hamiltonian.num_qubits, "num_terms": len(hamiltonian)}), encoding="utf-8")
+            os.replace(temporary, path)
+        except OSError:
+            pass
+    return energy
+
+def reference_energies(pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: Union[List[Tuple[complex, List[int]]], PauliSum],
+    cache_dir: Optional[Union[str, Path]] = REFERENCE_CACHE_DIR) -> Tuple[Optional[float], Optional[float]]:
+    # Энергия основного состояния H и минимум в секторе симметрий анзаца (сужение по Z2-симметриям H и анзаца).
+    # U|0...0> не покидает этот сектор, поэтому второе значение - нижняя граница, достижимая анзацем;
+    # оно может быть выше первого. None - задача больше MAX_REFERENCE_QUBITS кубитов
+    hamiltonian = compress_hamiltonian(hamiltonian if isinstance(hamiltonian, PauliSum) else PauliSum.from_terms(hamiltonian))
+    sector_hamiltonian = taper_problem(pauli_operators, hamiltonian)[1]
+    exact = reference_energy(hamiltonian, cache_dir) if hamiltonian.num_qubits <= MAX_REFERENCE_QUBITS else None
+    sector = reference_energy(sector_hamiltonian, cache_dir) if sector_hamiltonian.num_qubits <= MAX_REFERENCE_QUBITS else None
+    return exact, sector
+
+def chemical_accuracy_callback(reference: float, tolerance: float = CHEMICAL_ACCURACY) -> Any:
+    # callback оптимизатора: остановка, как только лучшая энергия в пределах tolerance от точной
+    def callback(theta: np.ndarray, energy: float) -> bool:
+        return energy <= reference + tolerance
+    return callback
@@ -0,0 +1,36 @@
+import numpy as np
+from typing import Any, Tuple
+from .pauli_backend import PARAMETER_SHIFT
+
+def rotosolve(initial_theta: np.ndarray, backend: Any, progress: Any = None, task: Any = None, max_sweeps: int = 50,
+    tolerance: float = 1e-9, verbose: bool = True) -> Tuple[np.ndarray, float]:
+    # E(α_k) = A + B·cos(2α_k) + C·sin(2α_k) при фиксированных остальных параметрах,
+    # поэтому точный минимум по α_k находится по трем значениям энергии: E(α_k), E(α_k ± π/4)
+    if progress is not None:
+        progress.reset(task, total=max_sweeps)
+
+    energy = backend.reset(initial_theta)
+    for _ in range(max_sweeps):
+        previous_energy = energy
+        for k in range(len(backend.theta)):
+            coeff = np.real(backend.coeffs[k])
+            if abs(coeff) < 1e-12:
+                continue
+            angle = backend.theta[k] * coeff
+            energy_plus = backend.energy_at(k, (angle + PARAMETER_SHIFT) / coeff)
+            energy_minus = backend.energy_at(k, (angle - PARAMETER_SHIFT) / coeff)
+            cos_part = 2 * energy - energy_plus - energy_minus
+            sin_part = energy_plus - energy_minus
+            best_angle = (2 * angle - np.pi / 2 - np.arctan2(cos_part, sin_part)) / 2
+            energy = (energy_plus + energy_minus) / 2 - np.hypot(cos_part, sin_part) / 2
+            backend.update(k, (best_angle / coeff) % (2 * np.pi), energy)
+        if progress is not None:
+            progress.update(task, advance=1)
+        if previous_energy - energy < tolerance:
+            break
+
+    if progress is not None:
+        progress.update(task, completed=max_sweeps)
+    if verbose:
+        print(f"Финальная лучшая энергия (Rotosolve): {energy:.6f}")
+    return backend.theta.copy(), float(energy)
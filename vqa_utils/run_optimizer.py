@@ -0,0 +1,76 @@
+import numpy as np
+from typing import Any, List, Optional, Tuple, Union
+from .create_backend import create_backend
+from .pauli_sum import PauliSum
+from .preprocess_hamiltonian import compress_hamiltonian
+from .taper_qubits import taper_problem
+from .truncated_backend import TruncatedPauliBackend, DEFAULT_TRUNCATION_THRESHOLD
+from .simulated_annealing import simulated_annealing
+from .lbfgs_optimize import lbfgs_optimize
+from .adam_optimize import adam_optimize
+from .rotosolve import rotosolve
+
+OPTIMIZERS = ("anneal", "lbfgs", "adam", "hybrid", "rotosolve")
+
+def report_truncation(theta: np.ndarray, energy: float, backend: Any, verbose: bool) -> Tuple[np.ndarray, float, Optional[float]]:
+    # При отсечении разложения анзаца энергия приближенная: возвращается строгая оценка ее погрешности
+    # (None для точных бэкендов)
+    if not isinstance(backend, TruncatedPauliBackend):
+        return theta, energy, None
+    backend.energy(theta)
+    if verbose:
+        print(f"Энергия {energy:.6f} ± {backend.error_bound:.2e} (отброшенная норма разложения {backend.discarded_norm:.2e})")
+    return theta, energy, float(backend.error_bound)
+
+def run_optimizer(
+    initial_theta: np.ndarray,
+    pauli_operators: List[Any],
+    hamiltonian_operators: List[Any],
+    progress: Any,
+    task: Any,
+    optimizer: str = "anneal",
+    backend: str = "auto",
+    max_gradient_iterations: int = 200,
+    learning_rate: float = 0.05,
+    verbose: bool = True,
+    hamiltonian_threshold: float = 0.0,
+    taper_qubits: bool = True,
+    truncation_threshold: float = DEFAULT_TRUNCATION_THRESHOLD,
+    max_ansatz_terms: Optional[int] = None,
+    return_error_bound: bool = False,
+    **annealing_params: Any) -> Union[Tuple[np.ndarray, float], Tuple[np.ndarray, float, Optional[float]]]:
+    # return_error_bound=True: третьим элементом возвращается оценка погрешности энергии отсеченного разложения (None для точных бэкендов)
+    def finish(theta: np.ndarray, energy: float, error_bound: Optional[float]) -> Tuple[Any, ...]:
+        return (theta, energy, error_bound) if return_error_bound else (theta, energy)
+
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Неизвестный оптимизатор '{optimizer}'. Доступны: {', '.join(OPTIMIZERS)}")
+
+    # Предобработка один раз на весь запуск: слияние одинаковых строк и отсев малых слагаемых
+    hamiltonian = hamiltonian_operators if isinstance(hamiltonian_operators, PauliSum) else PauliSum.from_terms(hamiltonian_operators)
+    hamiltonian_operators = compress_hamiltonian(hamiltonian, hamiltonian_threshold)
+    if taper_qubits:
+        # Сужение по Z2-симметриям не меняет ни энергию, ни смысл theta: параметры те же, меняются только строки
+        pauli_operators, hamiltonian_operators, _ = taper_problem(pauli_operators, hamiltonian_operators)
+
+    if backend == "truncated":
+        backend = TruncatedPauliBackend(pauli_operators, hamiltonian_operators, truncation_threshold, max_ansatz_terms)
+
+    theta = initial_theta
+    if optimizer in ("anneal", "hybrid"):
+        theta, energy = simulated_annealing(initial_theta=theta, pauli_operators=pauli_operators, hamiltonian_operators=hamiltonian_operators,
+            progress=progress, task=task, backend=backend, verbose=verbose, **annealing_params)
+        if optimizer == "anneal":
+            return finish(*report_truncation(theta, energy, backend, verbose))
+
+    if optimizer == "rotosolve":
+        return finish(*rotosolve(theta, create_backend("incremental", pauli_operators, hamiltonian_operators), progress, task, max_gradient_iterations,
+            verbose=verbose), None)
+
+    # Градиентные методы работают с точной (бесшумной) энергией выбранного бэкенда
+    energy_backend = create_backend(backend, pauli_operators, hamiltonian_operators)
+    if optimizer == "adam":
+        theta, energy = adam_optimize(theta, energy_backend, progress, task, max_gradient_iterations, learning_rate, verbose=verbose)
+    else:
+        theta, energy = lbfgs_optimize(theta, energy_backend, progress, task, max_gradient_iterations, verbose=verbose)
+    return finish(*report_truncation(theta, energy, energy_backend, verbose))
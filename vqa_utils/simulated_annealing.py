@@ -1,42 +1,73 @@
 import numpy as np
-from typing import Any, List, Tuple
-from scipy.optimize import dual_annealing
-from .generate_neighbor_theta import generate_neighbor_theta
-from .calculate_ansatz import calculate_ansatz
-from .compute_uhu import compute_uhu
-from .calculate_expectation import calculate_expectation
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, Union
+from utils.calculate_temp_steps import calculate_temp_steps
+from .create_backend import create_backend
+from .move_proposals import create_move
+from .noise_model import create_noise_model, NoiselessModel, DEFAULT_NOISE_SCALE, DEFAULT_SHOTS
+from .pauli_sum import PauliSum
+from .telemetry import TELEMETRY
+from .checkpoint import AnnealingCheckpoint, CHECKPOINT_INTERVAL, load_checkpoint
+
+# Доля шагов термализации на каждом температурном уровне (от num_iterations_per_temp)
+THERMALIZATION_FRACTION = 0.2
+
+# Число независимых цепочек Метрополиса: их кандидаты вычисляются одним пакетом backend.batch_energy
+DEFAULT_NUM_CHAINS = 8
+
+# Целевая доля принятых ходов и скорость подстройки шага под нее
+TARGET_ACCEPTANCE = 0.44
+STEP_ADAPTATION_RATE = 1.0
+MIN_STEP_SIZE = 1e-4
+MAX_STEP_SIZE = np.pi
+
+def thermalization_steps(num_iterations_per_temp: int) -> int:
+    return int(num_iterations_per_temp * THERMALIZATION_FRACTION)
+
+def total_annealing_steps(initial_temp: float, cooling_rate: float, min_temp: float, num_iterations_per_temp: int) -> int:
+    # Полное число шагов расписания: уровни × (термализация + измерительные шаги)
+    return calculate_temp_steps(initial_temp, cooling_rate, min_temp) * (thermalization_steps(num_iterations_per_temp) + num_iterations_per_temp)
 
 class ProgressTracker:
-    def __init__(self, total_iterations: int, progress: Any, task: Any):
-        self.total_iterations = total_iterations
-        self.current_iteration = 0
+    def __init__(self, total_steps: int, progress: Any, task: Any, callback: Optional[Callable[[np.ndarray, float], bool]] = None,
+        verbose: bool = True):
+        self.total_steps = total_steps
         self.progress = progress
         self.task = task
-        self.last_update = 0
         self.best_energy = float('inf')
         self.best_theta = None
+        self.callback = callback
+        self.verbose = verbose
+        self.stopped = False
 
-    def update(self, xk, f, accepted):
-        self.current_iteration += 1
-        if f < self.best_energy:
-            self.best_energy = f
-            self.best_theta = xk.copy()
-            print(f"Новая лучшая энергия: {self.best_energy:.6f}")
-        
-        if self.current_iteration - self.last_update > self.total_iterations // 100:
-            if self.progress is not None:
-                self.progress.update(self.task, advance=1)
-            self.last_update = self.current_iteration
-
-def energy_function(theta: np.ndarray, pauli_operators: List[Any], hamiltonian_operators) -> float:
-    step_size: float = 0.05
-    neighbor_theta = generate_neighbor_theta(theta, step_size)
-    ansatz_dict, _, _ = calculate_ansatz(neighbor_theta, pauli_operators)
-    uhu_dict = compute_uhu(ansatz_dict, hamiltonian_operators)
-    energy = calculate_expectation(uhu_dict)
-    if np.isnan(energy) or np.isinf(energy):
+    def update(self, steps: int, theta: np.ndarray, energy: float) -> bool:
+        # Вызывается после каждого температурного уровня
+        if energy < self.best_energy:
+            self.best_energy = energy
+            self.best_theta = theta.copy()
+            TELEMETRY.event("best_energy", energy)
+            if self.verbose:
+                print(f"Новая лучшая энергия: {self.best_energy:.6f}")
+        if self.progress is not None:
+            self.progress.update(self.task, advance=steps)
+
+        # Возврат True останавливает отжиг досрочно
+        if self.callback is not None:
+            self.stopped = bool(self.callback(self.best_theta, self.best_energy))
+        return self.stopped
+
+def batch_energy_function(thetas: np.ndarray, backend: Any, noise_model: Any, rng: np.random.Generator) -> np.ndarray:
+    # Энергии всех кандидатов одним вызовом бэкенда в модели шума noise_model
+    energies = noise_model.energies(thetas, backend, rng)
+    TELEMETRY.count("evaluations", len(energies))
+    if not np.all(np.isfinite(energies)):
         raise ValueError("Получено некорректное значение энергии")
-    return energy
+    return energies
+
+def wrap_to_bounds(thetas: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    # Углы периодичны, поэтому кандидаты заворачиваются в границы, а не обрезаются по ним
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    return lower + np.mod(thetas - lower, upper - lower)
 
 def simulated_annealing(
     initial_theta: np.ndarray,
@@ -47,23 +78,107 @@ def simulated_annealing(
     initial_temp: float = 50.0,
     cooling_rate: float = 0.98,
     min_temp: float = 1e-6,
-    num_iterations_per_temp: int = 38, 
+    num_iterations_per_temp: int = 38,
     step_size: float = 0.05,
-    bounds: List[Tuple[float, float]] = None) -> Tuple[np.ndarray, float]:
+    bounds: List[Tuple[float, float]] = None,
+    backend: str = "auto",
+    seed: Optional[int] = None,
+    callback: Optional[Callable[[np.ndarray, float], bool]] = None,
+    verbose: bool = True,
+    checkpoint_path: Optional[Union[str, Path]] = None,
+    checkpoint_interval: int = CHECKPOINT_INTERVAL,
+    resume: bool = False,
+    move: Any = "gaussian",
+    num_chains: int = DEFAULT_NUM_CHAINS,
+    adaptive_step: bool = True,
+    noise: Any = "noiseless",
+    noise_scale: float = DEFAULT_NOISE_SCALE,
+    shots: int = DEFAULT_SHOTS) -> Tuple[np.ndarray, float]:
+
+    # Геометрическое расписание T_l = initial_temp · cooling_rate^l до min_temp. На каждом уровне
+    # num_chains цепочек делают термализационные и num_iterations_per_temp измерительных шагов Метрополиса;
+    # кандидаты всех цепочек вычисляются одним пакетом. По доле принятых ходов на измерительных шагах
+    # шаг каждой цепочки подстраивается к TARGET_ACCEPTANCE перед следующим уровнем.
+    # Ходы, принятие и шум энергии (noise: noiseless, parameter, shot) берут случайные числа из одного
+    # генератора, созданного по seed, поэтому расчет с фиксированным seed полностью воспроизводим.
+    # Возвращаемая энергия всегда точная: при шуме лучшая точка пересчитывается бэкендом без шума.
+    if not 0 < cooling_rate < 1:
+        raise ValueError("Коэффициент охлаждения должен лежать в интервале (0, 1)")
+    if num_chains < 1:
+        raise ValueError("Число цепочек должно быть положительным")
+    bounds = np.array([(0, 2*np.pi) for _ in initial_theta] if bounds is None else bounds, dtype=np.float64)
+    move = create_move(move)
+    num_levels = calculate_temp_steps(initial_temp, cooling_rate, min_temp)
+    steps_per_level = thermalization_steps(num_iterations_per_temp) + num_iterations_per_temp
+    progress_tracker = ProgressTracker(num_levels * steps_per_level, progress, task, callback, verbose)
+    checkpoint = AnnealingCheckpoint(checkpoint_path, num_levels) if checkpoint_path is not None else None
 
-    if bounds is None:
-        bounds = [(0, 2*np.pi) for _ in initial_theta]
-    total_iterations = num_iterations_per_temp
-    progress_tracker = ProgressTracker(total_iterations, progress, task)
+    rng = np.random.default_rng(seed)
+    hamiltonian = hamiltonian_operators if isinstance(hamiltonian_operators, PauliSum) else PauliSum.from_terms(hamiltonian_operators)
+    energy_backend = create_backend(backend, pauli_operators, hamiltonian)
+    noise_model = create_noise_model(noise, pauli_operators, hamiltonian, noise_scale, shots)
+    noiseless = getattr(noise_model, "name", None) == NoiselessModel.name
+    if verbose:
+        print(f"Модель шума: {getattr(noise_model, 'name', type(noise_model).__name__)} ({getattr(noise_model, 'cost', 'стоимость не указана')})")
+    level = 0
+    chains = np.repeat(wrap_to_bounds(np.asarray(initial_theta, dtype=np.float64)[None, :], bounds), num_chains, axis=0)
+    step_sizes = np.full(num_chains, float(step_size))
+    best_theta, best_energy = None, float("inf")
 
-    def objective_function(theta):
-        return energy_function(theta, pauli_operators, hamiltonian_operators)
+    state = load_checkpoint(checkpoint_path) if checkpoint is not None and resume else None
+    if state is not None:
+        if np.shape(state["theta"]) != chains.shape:
+            raise ValueError(f"Контрольная точка {checkpoint_path} относится к другому анзацу или числу цепочек")
+        if state["status"] == "done":
+            return np.array(state["best_theta"]), state["best_energy"]
+        # Состояние восстанавливается полностью, поэтому продолжение в точности повторяет непрерывный расчет
+        rng.bit_generator.state = state["generator_state"]
+        level, chains, step_sizes = state["iteration"], np.array(state["theta"]), np.array(state["step_sizes"])
+        energies = np.array(state["energy"])
+        best_theta, best_energy = np.array(state["best_theta"]), state["best_energy"]
+        progress_tracker.best_theta, progress_tracker.best_energy = best_theta, best_energy
+        checkpoint.history = list(state["history"])
+        if progress is not None:
+            progress.update(task, advance=level * steps_per_level)
+        if verbose:
+            print(f"Продолжение с температурного уровня {level} из {num_levels}, лучшая энергия: {best_energy:.6f}")
+    else:
+        energies = batch_energy_function(chains, energy_backend, noise_model, rng)
+        best_theta, best_energy = chains[0].copy(), float(energies.min())
+        if not noiseless:
+            best_energy = float(energy_backend.batch_energy(best_theta)[0])
 
-    result = dual_annealing(func=objective_function, bounds=bounds, maxiter=num_iterations_per_temp,
-        initial_temp=initial_temp,
-        callback=progress_tracker.update)
+    with TELEMETRY.stage("annealing"):
+        while level < num_levels and not progress_tracker.stopped:
+            temperature = initial_temp * cooling_rate ** level
+            accepted = np.zeros(num_chains)
+            for step in range(steps_per_level):
+                candidates = wrap_to_bounds(move.propose(chains, step_sizes, rng), bounds)
+                candidate_energies = batch_energy_function(candidates, energy_backend, noise_model, rng)
+                delta = candidate_energies - energies
+                accept = (delta <= 0) | (rng.random(num_chains) < np.exp(-np.maximum(delta, 0) / temperature))
+                chains[accept], energies[accept] = candidates[accept], candidate_energies[accept]
+                if step >= steps_per_level - num_iterations_per_temp:
+                    accepted += accept
+                best_chain = np.argmin(energies)
+                if noiseless and energies[best_chain] < best_energy:
+                    best_theta, best_energy = chains[best_chain].copy(), float(energies[best_chain])
+            if not noiseless:
+                # Минимум шумных выборок смещен вниз и может быть ниже основного состояния, поэтому лучшая точка
+                # выбирается по точной энергии цепочек в конце уровня: ее получают callback, контрольная точка и вызывающий код
+                exact_energies = energy_backend.batch_energy(chains)
+                best_chain = np.argmin(exact_energies)
+                if exact_energies[best_chain] < best_energy:
+                    best_theta, best_energy = chains[best_chain].copy(), float(exact_energies[best_chain])
+            if adaptive_step and num_iterations_per_temp > 0:
+                acceptance = accepted / num_iterations_per_temp
+                step_sizes = np.clip(step_sizes * np.exp(STEP_ADAPTATION_RATE * (acceptance - TARGET_ACCEPTANCE)), MIN_STEP_SIZE, MAX_STEP_SIZE)
+            level += 1
+            progress_tracker.update(steps_per_level, best_theta, best_energy)
+            if checkpoint is not None and (level % checkpoint_interval == 0 or level >= num_levels or progress_tracker.stopped):
+                checkpoint.save(level, initial_temp * cooling_rate ** level, chains, energies, best_theta, best_energy,
+                    done=level >= num_levels or progress_tracker.stopped, step_sizes=step_sizes.tolist(), generator_state=rng.bit_generator.state)
 
-    best_theta = result.x
-    best_energy = result.fun
-    print(f"Финальная лучшая энергия: {best_energy:.6f}")
-    return best_theta, best_energy
\ No newline at end of file
+    if verbose:
+        print(f"Финальная лучшая энергия: {best_energy:.6f}")
+    return best_theta, best_energy
@@ -0,0 +1,109 @@
+import numpy as np
+from typing import List, Tuple
+from .pauli_sum import PauliSum, PHASES
+from .popcount import popcount
+from .preprocess_hamiltonian import x_mask_groups, group_diagonal, apply_grouped_hamiltonian
+from .telemetry import TELEMETRY
+
+# Предел памяти под предвычисленные диагонали групп гамильтониана и таблицы поворотов
+DIAGONAL_CACHE_BYTES = 256 * 1024 * 1024
+
+class StatevectorBackend:
+    name = "statevector"
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum):
+        operators = PauliSum.from_terms(pauli_operators)
+        if operators.num_qubits != hamiltonian.num_qubits:
+            raise ValueError("Число кубитов анзаца и гамильтониана должно совпадать")
+        if hamiltonian.num_qubits > 62:
+            raise ValueError("Вектор состояния поддерживается не более чем для 62 кубитов")
+
+        self.num_qubits = hamiltonian.num_qubits
+        self.basis = np.arange(1 << self.num_qubits, dtype=np.uint64)
+        self.coeffs = np.array([c for c, _ in pauli_operators])
+        self.op_x = operators.x[:, 0].copy()
+        self.op_z = operators.z[:, 0].copy()
+        self.op_phase = PHASES[popcount(self.op_x & self.op_z) & 3]
+        self.op_tables = None
+        if len(self.coeffs) * len(self.basis) * 24 <= DIAGONAL_CACHE_BYTES:
+            self.op_tables = [self._pauli_table(k) for k in range(len(self.coeffs))]
+
+        # Слагаемые гамильтониана с одинаковой X-маской применяются одной перестановкой
+        self.groups = [(x[0], z[:, 0], coeffs) for x, z, coeffs in x_mask_groups(hamiltonian)]
+        self.diagonals = []
+        if len(self.groups) * len(self.basis) * 16 <= DIAGONAL_CACHE_BYTES:
+            self.diagonals = [group_diagonal(*group, self.basis) for group in self.groups]
+        # Разложения U и U†HU здесь не строятся: вместо |U| и |UHU| записываются размерность состояния и число групп H
+        TELEMETRY.size("state_dimension", len(self.basis))
+        TELEMETRY.size("hamiltonian_x_groups", len(self.groups))
+
+    def zero_state(self) -> np.ndarray:
+        state = np.zeros(len(self.basis), dtype=np.complex128)
+        state[0] = 1.0
+        return state
+
+    def _pauli_table(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # (Pψ)[c] = i^{x·z} (-1)^{z·(c ^ x)} ψ[c ^ x]
+        source = self.basis ^ self.op_x[k]
+        signs = 1 - 2 * (popcount(source & self.op_z[k]) & 1)
+        return source.astype(np.intp), self.op_phase[k] * signs
+
+    def apply_pauli(self, state: np.ndarray, k: int) -> np.ndarray:
+        source, factor = self.op_tables[k] if self.op_tables is not None else self._pauli_table(k)
+        return factor * state[..., source]
+
+    def apply_rotation(self, state: np.ndarray, k: int, angle: float | np.ndarray) -> np.ndarray:
+        # exp(iαP)ψ = cos(α)ψ + i·sin(α)Pψ, результат записывается в state;
+        # для пакета состояний [B, 2^n] angle задается массивом [B]
+        angle = np.asarray(angle)[..., None] if np.ndim(angle) else angle
+        flipped = self.apply_pauli(state, k)
+        state *= np.cos(angle)
+        state += (1j * np.sin(angle)) * flipped
+        return state
+
+    def prepare_state(self, theta: np.ndarray) -> np.ndarray:
+        if len(theta) != len(self.coeffs):
+            raise ValueError("Размеры theta и pauli_operators должны совпадать")
+        # U = R_1 R_2 ... R_P, поэтому к |0...0> первым применяется R_P
+        state = self.zero_state()
+        with TELEMETRY.stage("ansatz_expansion"):
+            for k in reversed(range(len(self.coeffs))):
+                self.apply_rotation(state, k, theta[k] * self.coeffs[k])
+        return state
+
+    def apply_hamiltonian(self, state: np.ndarray) -> np.ndarray:
+        # state может быть пакетом [B, 2^n]: перестановка и диагональ действуют по последней оси
+        return apply_grouped_hamiltonian(state, self.groups, self.basis, self.diagonals)
+
+    def expectation(self, state: np.ndarray) -> float:
+        with TELEMETRY.stage("expectation"):
+            return float(np.vdot(state, self.apply_hamiltonian(state)).real)
+
+    def energy(self, theta: np.ndarray) -> float:
+        return self.expectation(self.prepare_state(theta))
+
+    def batch_energy(self, thetas: np.ndarray) -> np.ndarray:
+        thetas = np.atleast_2d(thetas)
+        if thetas.shape[1] != len(self.coeffs):
+            raise ValueError("Размеры theta и pauli_operators должны совпадать")
+        states = np.zeros((len(thetas), len(self.basis)), dtype=np.complex128)
+        states[:, 0] = 1.0
+        with TELEMETRY.stage("ansatz_expansion"):
+            for k in reversed(range(len(self.coeffs))):
+                self.apply_rotation(states, k, thetas[:, k] * self.coeffs[k])
+        with TELEMETRY.stage("expectation"):
+            return np.einsum("bi,bi->b", states.conj(), self.apply_hamiltonian(states)).real
+
+    def energy_and_gradient(self, theta: np.ndarray) -> Tuple[float, np.ndarray]:
+        # Сопряженный проход: dE/dα_k = 2·Re<R_{k-1}†...R_1† Hψ | iP_k | R_k...R_P|0>>,
+        # что совпадает с правилом сдвига параметра, но стоит O(P) поворотов вместо O(P^2)
+        state = self.prepare_state(theta)
+        costate = self.apply_hamiltonian(state)
+        energy = float(np.vdot(state, costate).real)
+        gradient = np.zeros(len(self.coeffs))
+        for k in range(len(self.coeffs)):
+            gradient[k] = 2 * np.real(self.coeffs[k]) * np.vdot(costate, 1j * self.apply_pauli(state, k)).real
+            angle = theta[k] * self.coeffs[k]
+            self.apply_rotation(state, k, -angle)
+            self.apply_rotation(costate, k, -angle)
+        return energy, gradient
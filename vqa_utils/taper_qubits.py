@@ -0,0 +1,136 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from .pauli_sum import PauliSum, PHASES, compose_mask_arrays, num_words
+from .popcount import popcount
+
+def mask_bits(masks: np.ndarray, num_qubits: int) -> np.ndarray:
+    qubits = np.arange(num_qubits)
+    return ((masks[:, qubits // 64] >> (qubits % 64).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+def bits_to_masks(bits: np.ndarray) -> np.ndarray:
+    masks = np.zeros((len(bits), num_words(bits.shape[1])), dtype=np.uint64)
+    for qubit in range(bits.shape[1]):
+        masks[:, qubit // 64] |= bits[:, qubit].astype(np.uint64) << np.uint64(qubit % 64)
+    return masks
+
+def gf2_null_space(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Приведение к ступенчатому виду над GF(2); базис ядра строится по свободным столбцам,
+    # поэтому свободный столбец f_i равен единице только в i-м векторе базиса
+    rows = rows.copy()
+    num_columns = rows.shape[1]
+    pivot_columns = []
+    for column in range(num_columns):
+        rank = len(pivot_columns)
+        candidates = np.flatnonzero(rows[rank:, column])
+        if len(candidates) == 0:
+            continue
+        pivot = rank + candidates[0]
+        rows[[rank, pivot]] = rows[[pivot, rank]]
+        eliminate = rows[:, column].copy()
+        eliminate[rank] = False
+        rows[eliminate] ^= rows[rank]
+        pivot_columns.append(column)
+        if len(pivot_columns) == len(rows):
+            break
+    free_columns = np.array([c for c in range(num_columns) if c not in set(pivot_columns)], dtype=np.int64)
+    basis = np.zeros((len(free_columns), num_columns), dtype=bool)
+    basis[np.arange(len(free_columns)), free_columns] = True
+    for row, column in enumerate(pivot_columns):
+        basis[:, column] = rows[row, free_columns]
+    return basis, free_columns
+
+def find_z2_symmetries(hamiltonian: PauliSum, operators: Optional[PauliSum] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # Z-строка Z^s коммутирует с P(x, z) тогда и только тогда, когда s·x = 0 (mod 2),
+    # поэтому симметрии - ядро матрицы X-масок гамильтониана (и анзаца, чтобы он не выводил из сектора)
+    masks = hamiltonian.x if operators is None else np.concatenate([hamiltonian.x, operators.x])
+    basis, pivots = gf2_null_space(mask_bits(np.unique(masks, axis=0), hamiltonian.num_qubits))
+    # Хотя бы один кубит должен остаться
+    if len(pivots) == hamiltonian.num_qubits:
+        basis, pivots = basis[:-1], pivots[:-1]
+    return bits_to_masks(basis), pivots
+
+class QubitTapering:
+    # Для каждой симметрии τ_i = Z^{s_i} с опорным кубитом q_i (s_j на q_i равен нулю при j ≠ i)
+    # клиффордово преобразование U_i = (X_{q_i} + τ_i)/√2 переводит τ_i в X_{q_i}. После U = Π U_i
+    # слагаемые действуют на q_i только как I или X, и X_{q_i} заменяется собственным значением сектора.
+    # |0...0> лежит в секторе +1 всех Z-симметрий, а U|0...0> = |0...0> ⊗ |+...+> на опорных кубитах,
+    # поэтому суженная задача тоже начинается с |0...0>.
+
+    def __init__(self, num_qubits: int, generators: np.ndarray, pivots: np.ndarray, sector: Optional[Sequence[int]] = None):
+        self.num_qubits = num_qubits
+        self.generators = generators
+        self.pivots = np.asarray(pivots, dtype=np.int64)
+        self.sector = np.ones(len(self.pivots), dtype=np.int64) if sector is None else np.asarray(sector, dtype=np.int64)
+        if len(self.sector) != len(self.pivots) or not np.all(np.abs(self.sector) == 1):
+            raise ValueError("Сектор задается значениями ±1 для каждой симметрии")
+        self.kept_qubits = np.setdiff1d(np.arange(num_qubits), self.pivots)
+
+    @property
+    def num_tapered(self) -> int:
+        return len(self.pivots)
+
+    @property
+    def reference_state(self) -> int:
+        # Базисное состояние полного регистра, которому соответствует |0...0> суженной задачи
+        return sum(1 << int(q) for q, s in zip(self.pivots, self.sector) if s < 0)
+
+    def _pivot_masks(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        pivot = np.zeros((1, num_words(self.num_qubits)), dtype=np.uint64)
+        pivot[0, self.pivots[i] // 64] = np.uint64(1) << np.uint64(self.pivots[i] % 64)
+        return pivot, self.generators[i:i + 1]
+
+    def _transform(self, terms: PauliSum) -> PauliSum:
+        # U_i P U_i = P, если P коммутирует с X_{q_i}, иначе X_{q_i}·P·τ_i
+        x, z, coeffs = terms.x.copy(), terms.z.copy(), terms.coeffs.copy()
+        for i in range(self.num_tapered):
+            pivot, generator = self._pivot_masks(i)
+            flip = (z & pivot).any(axis=1)
+            power_left, left_x, left_z = compose_mask_arrays(pivot, np.zeros_like(pivot), x[flip], z[flip])
+            power_right, x[flip], z[flip] = compose_mask_arrays(left_x, left_z, np.zeros_like(generator), generator)
+            coeffs[flip] *= PHASES[(power_left + power_right) & 3]
+        return PauliSum(x, z, coeffs, self.num_qubits)
+
+    def _project(self, terms: PauliSum) -> Tuple[np.ndarray, np.ndarray]:
+        # X_{q_i} -> собственное значение сектора, опорные кубиты удаляются
+        terms = self._transform(terms)
+        coeffs = terms.coeffs.copy()
+        for i in range(self.num_tapered):
+            pivot, _ = self._pivot_masks(i)
+            if (terms.z & pivot).any():
+                raise ValueError("Слагаемое не коммутирует с симметрией")
+            coeffs[(terms.x & pivot).any(axis=1)] *= self.sector[i]
+        return terms.to_indices_array()[:, self.kept_qubits], coeffs
+
+    def taper_hamiltonian(self, hamiltonian: PauliSum) -> PauliSum:
+        indices, coeffs = self._project(hamiltonian)
+        return PauliSum.from_indices_array(indices, coeffs).simplify().prune()
+
+    def taper_operators(self, pauli_operators: List[Tuple[complex, List[int]]]) -> List[Tuple[complex, List[int]]]:
+        # Строки анзаца не сливаются: каждая сохраняет свой параметр, меняется только знак коэффициента
+        operators = PauliSum.from_terms([(1.0, op) for _, op in pauli_operators])
+        indices, signs = self._project(operators)
+        return [(coeff * float(sign.real), op) for (coeff, _), sign, op in zip(pauli_operators, signs, indices.tolist())]
+
+    def untaper_state(self, state: np.ndarray) -> np.ndarray:
+        # Вектор состояния суженной задачи -> полный регистр: ψ = U (ψ' ⊗ |сектор>), U = U† как произведение U_i
+        basis = np.arange(1 << self.num_qubits, dtype=np.int64)
+        reduced_index = np.zeros_like(basis)
+        for position, qubit in enumerate(self.kept_qubits):
+            reduced_index |= ((basis >> qubit) & 1) << position
+        amplitudes = np.ones(len(basis)) / np.sqrt(2) ** self.num_tapered
+        for qubit, sign in zip(self.pivots, self.sector):
+            amplitudes *= np.where((basis >> qubit) & 1, sign, 1)
+        full = np.asarray(state)[..., reduced_index] * amplitudes
+        for i in range(self.num_tapered):
+            signs = 1 - 2 * (popcount(basis.astype(np.uint64) & self.generators[i, 0]) & 1)
+            full = (full[..., basis ^ (1 << int(self.pivots[i]))] + signs * full) / np.sqrt(2)
+        return full
+
+def taper_problem(pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum, sector: Optional[Sequence[int]] = None
+    ) -> Tuple[List[Tuple[complex, List[int]]], PauliSum, QubitTapering]:
+    operators = PauliSum.from_terms(pauli_operators)
+    generators, pivots = find_z2_symmetries(hamiltonian, operators)
+    tapering = QubitTapering(hamiltonian.num_qubits, generators, pivots, sector)
+    if tapering.num_tapered == 0:
+        return pauli_operators, hamiltonian, tapering
+    return tapering.taper_operators(pauli_operators), tapering.taper_hamiltonian(hamiltonian), tapering
@@ -0,0 +1,143 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# Наибольшее число событий (например, новых лучших энергий), хранимых в трассе
+MAX_EVENTS = 10000
+
+def peak_memory_bytes() -> Optional[int]:
+    # Максимум памяти процесса: ru_maxrss (килобайты в Linux, байты в macOS) или пик tracemalloc
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+    except ImportError:
+        return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+
+class StageTimer:
+    def __init__(self, telemetry: "Telemetry", name: str):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self) -> "StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.telemetry.add_time(self.name, time.perf_counter() - self.start)
+
+class Telemetry:
+    # Этапы конвейера: parsing (чтение гамильтониана), ansatz_expansion (разложение U или подготовка U|0>),
+    # uhu_composition (сопоставление H с носителем U|0>), expectation (<0|U†HU|0>), annealing (цикл отжига).
+    # Замеры по этапам (число вызовов, суммарное и максимальное время), счетчики (число вычисленных
+    # энергий), размеры (последнее и наибольшее значение) и события.
+    # Размеры зависят от бэкенда: pauli/incremental/truncated записывают ansatz_terms (|U|) и uhu_terms (|UHU|),
+    # statevector - state_dimension (2^n) и hamiltonian_x_groups; у statevector нет этапа uhu_composition,
+    # а ansatz_expansion означает подготовку U|0>. hamiltonian_terms записывается при чтении файла.
+    # В выключенном состоянии stage() возвращает общий пустой контекст, а остальные методы сразу выходят.
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._disabled_stage = nullcontext()
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.sizes: Dict[str, Dict[str, int]] = {}
+        self.events: List[Dict[str, Any]] = []
+
+    def enable(self, trace_memory: bool = False) -> None:
+        self.enabled = True
+        self.reset()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def stage(self, name: str) -> Any:
+        return StageTimer(self, name) if self.enabled else self._disabled_stage
+
+    def add_time(self, name: str, seconds: float) -> None:
+        stats = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def size(self, name: str, value: int) -> None:
+        if self.enabled:
+            stats = self.sizes.setdefault(name, {"last": 0, "max": 0})
+            stats["last"] = int(value)
+            stats["max"] = max(stats["max"], int(value))
+
+    def event(self, name: str, value: float) -> None:
+        if self.enabled and len(self.events) < MAX_EVENTS:
+            self.events.append({"name": name, "time": time.perf_counter() - self.started, "value": float(value)})
+
+    def evaluations_per_second(self) -> Optional[float]:
+        seconds = self.stages.get("annealing", {}).get("seconds", 0.0)
+        evaluations = self.counters.get("evaluations", 0)
+        return evaluations / seconds if seconds > 0 and evaluations else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = {"wall_seconds": time.perf_counter() - self.started, "stages": self.stages, "counters": self.counters,
+            "sizes": self.sizes, "evaluations_per_second": self.evaluations_per_second(), "peak_memory_bytes": peak_memory_bytes(),
+            "events": self.events}
+        if tracemalloc.is_tracing():
+            report["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        return report
+
+    def merge(self, report: Dict[str, Any]) -> None:
+        # Сведение отчета другого процесса (запуска мультистарта): времена и счетчики складываются
+        for name, stats in report.get("stages", {}).items():
+            total = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            total["calls"] += stats["calls"]
+            total["seconds"] += stats["seconds"]
+            total["max_seconds"] = max(total["max_seconds"], stats["max_seconds"])
+        for name, value in report.get("counters", {}).items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name, stats in report.get("sizes", {}).items():
+            total = self.sizes.setdefault(name, {"last": 0, "max": 0})
+            total["last"] = stats["last"]
+            total["max"] = max(total["max"], stats["max"])
+        self.events.extend(report.get("events", [])[:max(0, MAX_EVENTS - len(self.events))])
+
+    def write_json(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def __rich__(self) -> Any:
+        # Таблица для rich: может выводиться один раз или обновляться внутри Live (словари копируются,
+        # так как Live перерисовывает ее из своего потока)
+        from rich.table import Table
+        table = Table(title="Телеметрия", expand=False)
+        table.add_column("Этап / величина")
+        table.add_column("Вызовы", justify="right")
+        table.add_column("Время, с", justify="right")
+        table.add_column("Макс., мс", justify="right")
+        for name, stats in sorted(list(self.stages.items()), key=lambda item: -item[1]["seconds"]):
+            table.add_row(name, str(stats["calls"]), f"{stats['seconds']:.3f}", f"{stats['max_seconds'] * 1e3:.2f}")
+        for name, value in list(self.counters.items()):
+            table.add_row(name, str(value), "", "")
+        for name, stats in list(self.sizes.items()):
+            table.add_row(name, f"{stats['last']} (макс. {stats['max']})", "", "")
+        rate = self.evaluations_per_second()
+        if rate is not None:
+            table.add_row("вычислений энергии в секунду", f"{rate:.0f}", "", "")
+        peak = peak_memory_bytes()
+        if peak is not None:
+            table.add_row("пик памяти, МБ", f"{peak / 2**20:.1f}", "", "")
+        return table
+
+TELEMETRY = Telemetry()
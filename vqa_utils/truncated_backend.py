@@ -0,0 +1,86 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from .expand_ansatz import expand_ansatz_truncated_batch, energy_error_bound, validate_threshold
+from .pauli_backend import PauliBackend, PARAMETER_SHIFT
+from .pauli_sum import PauliSum, PHASES, MULTIPLY_BLOCK_SIZE, labeled_mask_keys
+from .popcount import popcount
+from .preprocess_hamiltonian import x_mask_groups
+from .telemetry import TELEMETRY
+
+# Порог отсечения коэффициентов разложения по умолчанию
+DEFAULT_TRUNCATION_THRESHOLD = 1e-6
+
+class TruncatedPauliBackend(PauliBackend):
+    name = "truncated"
+
+    # Приближенное разложение анзаца для глубоких схем, точное разложение которых не помещается в память:
+    # после каждого поворота отбрасываются малые слагаемые (или все, кроме max_terms наибольших).
+    # error_bound - строгая оценка погрешности последней вычисленной энергии (для пакета - каждой из его энергий).
+
+    def __init__(self, pauli_operators: List[Tuple[complex, List[int]]], hamiltonian: PauliSum,
+        threshold: float = DEFAULT_TRUNCATION_THRESHOLD, max_terms: Optional[int] = None):
+        validate_threshold(threshold)
+        super().__init__(pauli_operators, hamiltonian)
+        self.threshold = threshold
+        self.max_terms = max_terms
+        self.discarded_norm = 0.0
+        self.state_norm = 1.0
+
+        # Группы X-масок H и фазы i^{x·z} слагаемых вычисляются один раз, а не при каждой энергии
+        self.hamiltonian_groups = [(x, z, coeffs * PHASES[popcount(x & z).sum(axis=-1) & 3]) for x, z, coeffs in x_mask_groups(hamiltonian)]
+
+    @property
+    def error_bound(self) -> float:
+        return energy_error_bound(self.discarded_norm, self.hamiltonian, self.state_norm)
+
+    def _expectations(self, labels: np.ndarray, ansatz: PauliSum, num_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        # <ψ_b|H|ψ_b> и ||ψ_b|| для всех точек: Ũ|0> сворачивается в амплитуды (точка, |x>), и переходы
+        # |x> -> |x ^ x_g> ищутся по ключам с меткой точки одним поиском на группу X-масок
+        num_qubits = ansatz.num_qubits
+        amplitudes = ansatz.coeffs * PHASES[popcount(ansatz.x & ansatz.z).sum(axis=-1) & 3]
+        keys, first, inverse = np.unique(labeled_mask_keys(labels, ansatz.x, None, num_qubits),
+            return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        state = np.bincount(inverse, weights=amplitudes.real, minlength=len(first)) + 1j * np.bincount(inverse, weights=amplitudes.imag, minlength=len(first))
+        state_x, state_labels = ansatz.x[first], labels[first]
+        block_rows = max(1, MULTIPLY_BLOCK_SIZE // len(state))
+
+        energies = np.zeros(num_points)
+        with TELEMETRY.stage("expectation"):
+            for x_mask, z_masks, coeffs in self.hamiltonian_groups:
+                target_keys = labeled_mask_keys(state_labels, state_x ^ x_mask, None, num_qubits)
+                positions = np.searchsorted(keys, target_keys).clip(max=len(keys) - 1)
+                bra = np.where(keys[positions] == target_keys, state[positions].conj(), 0)
+                # D_g[x] = Σ_h c_h i^{x_h·z_h} (-1)^{z_h·x}
+                diagonal = np.zeros(len(state), dtype=np.complex128)
+                for start in range(0, len(coeffs), block_rows):
+                    block = slice(start, start + block_rows)
+                    signs = 1 - 2 * (popcount(z_masks[block, None, :] & state_x[None, :, :]).sum(axis=-1) & 1)
+                    diagonal += coeffs[block] @ signs
+                energies += np.bincount(state_labels, weights=(bra * diagonal * state).real, minlength=num_points)
+        return energies, np.sqrt(np.bincount(state_labels, weights=np.abs(state) ** 2, minlength=num_points))
+
+    def _evaluate(self, angles: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        labels, ansatz, discarded_norms = expand_ansatz_truncated_batch(angles, self.operators, self.threshold, self.max_terms)
+        energies, state_norms = self._expectations(labels, ansatz, len(angles))
+        return energies, discarded_norms, state_norms
+
+    def batch_energy(self, thetas: np.ndarray) -> np.ndarray:
+        # Весь пакет разлагается за один проход; error_bound ограничивает погрешность каждой энергии пакета
+        thetas = np.atleast_2d(thetas)
+        if thetas.shape[1] != len(self.coeffs):
+            raise ValueError("Размеры theta и pauli_operators должны совпадать")
+        energies, discarded_norms, state_norms = self._evaluate(thetas * self.coeffs[None, :])
+        self.discarded_norm, self.state_norm = float(discarded_norms.max()), float(state_norms.max())
+        return energies
+
+    def energy_and_gradient(self, theta: np.ndarray) -> Tuple[float, np.ndarray]:
+        # Правило сдвига параметра по приближенным энергиям (исходная точка и 2P сдвигов одним пакетом);
+        # каждая из них отличается от точной не более чем на error_bound
+        angles = np.asarray(theta) * self.coeffs
+        num_parameters = len(angles)
+        shifts = np.eye(num_parameters) * PARAMETER_SHIFT
+        energies, discarded_norms, state_norms = self._evaluate(angles[None, :] + np.concatenate([np.zeros((1, num_parameters)), shifts, -shifts]))
+        self.discarded_norm, self.state_norm = float(discarded_norms[0]), float(state_norms[0])
+        gradient = np.real(self.coeffs) * (energies[1:num_parameters + 1] - energies[num_parameters + 1:])
+        return float(energies[0]), gradient